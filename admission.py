@@ -0,0 +1,144 @@
+import math
+import os
+import threading
+import time
+from collections import Counter
+
+import ai_pool
+import strategies
+
+# Admission control for AI computation. Every AI move takes one of a few
+# compute slots (by default one per CPU); moves waiting for a slot form the
+# queue. When the queue gets deep, moves are chosen with their strategy's
+# cheaper fallback tier, so the backlog drains faster; the game keeps its own
+# strategy and returns to it once the pressure is gone. When the queue is
+# full, new games and new player moves are turned away with a hint of when to
+# retry, rather than piling more AI work onto a server that is already behind.
+
+# AI moves computed at once
+SLOTS = os.cpu_count() or 1
+
+# Moves waiting for a slot before new games and moves are turned away
+MAX_QUEUED = 16
+
+# Retry hints, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 30
+
+# Retry hint when the live game limit is reached: games take minutes, not
+# the seconds an AI backlog takes to drain
+GAMES_RETRY_AFTER = 30
+
+# Weight of the newest move in the running average of AI move time
+TIME_SMOOTHING = 0.1
+
+_scheduler = None
+
+
+class Scheduler:
+    """Compute slots for AI moves, with degradation and rejection under load"""
+
+    def __init__(self, slots=SLOTS, max_queued=MAX_QUEUED, degrade_at=None, max_games=0):
+        self.slots = slots
+        self.max_queued = max_queued
+        self.degrade_at = degrade_at if degrade_at is not None else max(1, max_queued // 4)
+        self.max_games = max_games  # Unfinished games before new ones are turned away; 0 for no limit
+        self.waiting = 0
+        self.running = 0
+        self.moves = 0
+        self.degraded = Counter()  # By the strategy that was degraded
+        self.rejected_games = 0
+        self.rejected_moves = 0
+        self.move_time = 0.0  # Running average of seconds per AI move
+        self._slots = threading.BoundedSemaphore(slots)
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained"""
+        with self._lock:
+            backlog = (self.waiting + self.running) * self.move_time / self.slots
+        return min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(backlog)))
+
+    def admit_game(self, live_games):
+        """None if a new game may start, else the seconds to wait before asking again.
+
+        live_games() counts the unfinished games; it is only called when there is a limit.
+        """
+        with self._lock:
+            busy = self.waiting >= self.max_queued
+        at_limit = not busy and self.max_games > 0 and live_games() >= self.max_games
+        if busy or at_limit:
+            with self._lock:
+                self.rejected_games += 1
+        if busy:
+            return self.retry_after()
+        return GAMES_RETRY_AFTER if at_limit else None
+
+    def admit_move(self):
+        """None if a player move (and the AI reply it leads to) may go ahead, else the seconds to wait"""
+        with self._lock:
+            full = self.waiting >= self.max_queued
+            if full:
+                self.rejected_moves += 1
+        return self.retry_after() if full else None
+
+    def decide(self, game):
+        """The AI's move for a game, once a compute slot is free"""
+        with self._lock:
+            self.waiting += 1
+        self._slots.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+            # Judge the pressure by the moves still queued behind this one
+            strategy = game.strategy
+            fallback = strategies.get(strategy).fallback
+            if fallback is not None and self.waiting >= self.degrade_at:
+                self.degraded[strategy] += 1
+                strategy = fallback
+
+        start = time.perf_counter()
+        try:
+            return ai_pool.decide(game, strategy)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.running -= 1
+                self.moves += 1
+                self.move_time += TIME_SMOOTHING * (elapsed - self.move_time)
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {"slots": self.slots, "waiting": self.waiting, "running": self.running, "moves": self.moves,
+                    "degraded": dict(self.degraded), "rejectedGames": self.rejected_games,
+                    "rejectedMoves": self.rejected_moves, "moveSeconds": self.move_time}
+
+
+def start(slots=SLOTS, max_queued=MAX_QUEUED, max_games=0):
+    """Route every AI move in this process through a shared scheduler"""
+    global _scheduler
+    _scheduler = Scheduler(slots, max_queued, max_games=max_games)
+    return _scheduler
+
+
+def decide(game):
+    """The AI's move for a game, through the shared scheduler if one was started"""
+    if _scheduler is None:
+        return ai_pool.decide(game)
+    return _scheduler.decide(game)
+
+
+def render_metrics(metrics):
+    """Prometheus text exposition of [(name, type, help, value or {labels: value})]"""
+    lines = []
+    for name, kind, description, value in metrics:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        if isinstance(value, dict):
+            for labels, sample in sorted(value.items()):
+                label_text = ",".join(f'{key}="{item}"' for key, item in labels)
+                lines.append(f"{name}{{{label_text}}} {sample}")
+        else:
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
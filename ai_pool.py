@@ -0,0 +1,161 @@
+import logging
+import multiprocessing
+import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import lookahead
+import strategies
+from board import GRID_SIZE, SHIP_SIZES
+from placements import placement_index
+
+# Strategies registered with offload=True choose their moves in a pool of warm
+# worker processes, so their CPU time doesn't hold the GIL that every request
+# thread of the web worker shares. Only a compact copy of what the strategies
+# read goes to the worker, and only the chosen action comes back. When every
+# worker is busy, or the pool fails, the move is computed inline instead.
+
+# Seconds to wait for a worker before computing the move inline
+RESULT_TIMEOUT = 5.0
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+
+
+def compact(game, strategy=None):
+    """What the strategies read from a game, as a small picklable tuple (moving with strategy if given)"""
+    weights = game.prior.weights(game.player_id) if game.prior is not None else None
+    return (
+        strategy or game.strategy, game.size, game.turn_seed, bytes(game.ai_shots), game.ai_open_hits, game.ai_known_water,
+        game.ai_known_ships, game.remaining_player_ships, game.ai_hunt_mode, game.ai_last_hit, game.ai_orientation,
+        game.ai_moves, game.player_moves, bytes(game.player_shots), bytes(game.ai_powerups), weights,
+    )
+
+
+class FixedPrior:
+    """Stands in for the PlacementPrior in a worker, with the weights looked up by the server"""
+
+    __slots__ = ("_weights",)
+
+    def __init__(self, weights):
+        self._weights = weights
+
+    def weights(self, player_id=None):
+        return self._weights
+
+
+class GameView:
+    """A game rebuilt from compact(), with the attributes the strategies read"""
+
+    __slots__ = (
+        "strategy", "size", "turn_seed", "ai_shots", "ai_open_hits", "ai_known_water", "ai_known_ships",
+        "remaining_player_ships", "ai_hunt_mode", "ai_last_hit", "ai_orientation", "ai_moves", "player_moves",
+        "player_shots", "ai_powerups", "prior", "player_id",
+    )
+
+    def __init__(self, state):
+        (self.strategy, self.size, self.turn_seed, self.ai_shots, self.ai_open_hits, self.ai_known_water,
+         self.ai_known_ships, self.remaining_player_ships, self.ai_hunt_mode, self.ai_last_hit, self.ai_orientation,
+         self.ai_moves, self.player_moves, self.player_shots, self.ai_powerups, weights) = state
+        self.prior = FixedPrior(weights) if weights is not None else None
+        self.player_id = None
+
+    def new_rng(self):
+        return random.Random(self.turn_seed)
+
+
+def _warm(size):
+    """Worker initializer: build the shared tables a first move would otherwise pay for"""
+    placement_index(size, tuple(sorted(set(SHIP_SIZES))))
+    lookahead.symmetries(size)
+
+
+def _ping():
+    return os.getpid()
+
+
+def _decide(state):
+    return strategies.decide(GameView(state))
+
+
+class AIPool:
+    """Warm worker processes choosing moves for the offloaded strategies"""
+
+    def __init__(self, workers, max_pending=None, size=GRID_SIZE):
+        self.workers = workers
+        self.max_pending = max_pending or workers  # Moves in flight before new ones run inline
+        self.owner = os.getpid()
+        self.offloaded = 0
+        self.inline = 0
+        self.failures = 0
+        self.broken = False  # A worker died; the pool is no longer used
+        self._pending = 0
+        self._lock = threading.Lock()
+        # Fork where available: the workers only need modules the server has
+        # already imported, and spawning would re-run the server's own startup
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self._executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_warm, initargs=(size,))
+
+    def warm(self):
+        """Start every worker now, rather than on the first offloaded move"""
+        for future in [self._executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def decide(self, game, strategy=None):
+        """strategies.decide(game, strategy), in a worker when the strategy is offloaded and one is free"""
+        if not strategies.get(strategy or game.strategy).offload or self.broken or os.getpid() != self.owner:
+            return strategies.decide(game, strategy)
+
+        with self._lock:
+            busy = self._pending >= self.max_pending
+            if busy:
+                self.inline += 1
+            else:
+                self._pending += 1
+        if busy:
+            return strategies.decide(game, strategy)
+
+        try:
+            action = self._executor.submit(_decide, compact(game, strategy)).result(timeout=RESULT_TIMEOUT)
+            with self._lock:
+                self.offloaded += 1
+            return action
+        except (BrokenProcessPool, FutureTimeout, OSError) as e:
+            with self._lock:
+                self.failures += 1
+                self.broken = isinstance(e, BrokenProcessPool)
+            logger.warning("AI pool failed (%s: %s); choosing the move inline", type(e).__name__, e)
+            return strategies.decide(game, strategy)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "pending": self._pending, "offloaded": self.offloaded,
+                    "inline": self.inline, "failures": self.failures, "broken": self.broken}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start(workers, max_pending=None):
+    """Start (and warm) the shared pool that decide() uses"""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = AIPool(workers, max_pending)
+    _pool.warm()
+    return _pool
+
+
+def decide(game, strategy=None):
+    """The AI's move for a game, through the shared pool if one was started"""
+    if _pool is None:
+        return strategies.decide(game, strategy)
+    return _pool.decide(game, strategy)
@@ -0,0 +1,64 @@
+import json
+import mimetypes
+import os
+
+from flask import abort, current_app, request, send_from_directory, url_for
+
+# Built files are content-addressed, so they never change under the same name
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+# Pre-compressed variants in order of preference
+ENCODING_SUFFIXES = [("br", ".br"), ("gzip", ".gz")]
+
+
+class AssetManifest:
+    """Maps static filenames to the fingerprinted files built by tools/build_assets.py"""
+
+    def __init__(self, dist_dir):
+        self.dist_dir = dist_dir
+        self.assets = {}
+        self.encodings = {}
+
+        path = os.path.join(dist_dir, "manifest.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+            for name, entry in manifest["assets"].items():
+                self.assets[name] = entry["path"]
+                self.encodings[entry["path"]] = entry["encodings"]
+
+    def url(self, filename):
+        """URL of a static file, using the built copy when there is one"""
+        built = self.assets.get(filename)
+        # In debug mode always serve the sources so edits show up without a rebuild
+        if built is None or current_app.debug:
+            return url_for('static', filename=filename)
+        return url_for('built_asset', filename=built)
+
+    def serve(self, filename):
+        """Send a built file, choosing a pre-compressed variant the client accepts"""
+        if filename not in self.encodings:
+            abort(404)
+
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODING_SUFFIXES:
+            if encoding in self.encodings[filename] and accepted[encoding]:
+                response = send_from_directory(self.dist_dir, filename + suffix, mimetype=mimetype)
+                response.headers["Content-Encoding"] = encoding
+                response.headers.pop("Content-Disposition", None)
+                break
+        else:
+            response = send_from_directory(self.dist_dir, filename, mimetype=mimetype)
+
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+def init_app(app):
+    """Register the asset_url template helper and the /assets route"""
+    manifest = AssetManifest(os.path.join(app.static_folder, "dist"))
+    app.jinja_env.globals["asset_url"] = manifest.url
+    app.add_url_rule('/assets/<path:filename>', 'built_asset', manifest.serve)
+    return manifest
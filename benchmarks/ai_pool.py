@@ -0,0 +1,117 @@
+"""Measure the cost of choosing AI moves in the worker pool instead of inline.
+
+Replays the AI turns of headless games for each strategy and decides every
+position both inline and through ai_pool.AIPool, reporting the size of
+the compact state sent to a worker, the time per move each way, and the
+pool's overhead over the worker's own compute time. A bare round trip to
+a worker is timed too. Finally a background thread standing in for other
+requests measures how late its 1 ms ticks run while the AI decides moves
+inline, and while the pool does.
+
+Usage: python -m benchmarks.ai_pool [--games 10] [--workers 2] [STRATEGY ...]
+"""
+import argparse
+import pickle
+import random
+import statistics
+import threading
+import time
+
+import ai_pool
+import strategies
+from benchmarks.strategies import random_fleet
+from game import BattleshipGame
+
+
+def timed_decide(state):
+    """Worker side: the move and the seconds it took to choose"""
+    start = time.perf_counter()
+    action = ai_pool._decide(state)
+    return action, time.perf_counter() - start
+
+
+def positions(name, games):
+    """Every AI turn of some headless games, as (game, state) just before the move"""
+    found = []
+    for seed in range(games):
+        game = BattleshipGame(strategy=name, seed=seed)
+        game.validate_player_ship_placement(random_fleet(random.Random(seed), game.size))
+        while not game.game_over:
+            game.current_turn = "ai"
+            found.append(ai_pool.compact(game))
+            game.ai_shoot()
+    return found
+
+
+def percentile(values, p):
+    return statistics.quantiles(values, n=100)[p - 1] if len(values) > 1 else values[0]
+
+
+def ticker(stop, lateness):
+    """Stand-in request thread: wake every 1 ms and record how late each wake-up was"""
+    while not stop.is_set():
+        due = time.perf_counter() + 0.001
+        time.sleep(0.001)
+        lateness.append(time.perf_counter() - due)
+
+
+def with_ticker(work):
+    stop = threading.Event()
+    lateness = []
+    thread = threading.Thread(target=ticker, args=(stop, lateness))
+    thread.start()
+    work()
+    stop.set()
+    thread.join()
+    return lateness
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("strategies", nargs="*", default=list(strategies.STRATEGIES))
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    pool = ai_pool.AIPool(args.workers)
+    pool.warm()
+    executor = pool._executor
+
+    pings = []
+    for _ in range(500):
+        start = time.perf_counter()
+        executor.submit(ai_pool._ping).result()
+        pings.append(time.perf_counter() - start)
+    print(f"bare round trip: {statistics.mean(pings) * 1e6:.0f} us (p99 {percentile(pings, 99) * 1e6:.0f})")
+
+    for name in args.strategies:
+        states = positions(name, args.games)
+        sizes = [len(pickle.dumps(state)) for state in states]
+        inline = []
+        for state in states:
+            start = time.perf_counter()
+            ai_pool._decide(state)
+            inline.append(time.perf_counter() - start)
+        pooled = []
+        overhead = []
+        for state in states:
+            start = time.perf_counter()
+            _, compute = executor.submit(timed_decide, state).result()
+            pooled.append(time.perf_counter() - start)
+            overhead.append(pooled[-1] - compute)
+
+        print(f"{name}: {len(states)} moves, state {statistics.mean(sizes):.0f} bytes pickled")
+        print(f"  inline {statistics.mean(inline) * 1e6:>7.0f} us/move (p99 {percentile(inline, 99) * 1e6:.0f})")
+        print(f"  pooled {statistics.mean(pooled) * 1e6:>7.0f} us/move (p99 {percentile(pooled, 99) * 1e6:.0f}), "
+              f"overhead {statistics.mean(overhead) * 1e6:.0f} us (p99 {percentile(overhead, 99) * 1e6:.0f})")
+
+        late_inline = with_ticker(lambda: [ai_pool._decide(state) for state in states])
+        late_pooled = with_ticker(lambda: [executor.submit(ai_pool._decide, state).result() for state in states])
+        print(f"  other thread's lateness: inline p99 {percentile(late_inline, 99) * 1e6:.0f} us, "
+              f"pooled p99 {percentile(late_pooled, 99) * 1e6:.0f} us")
+
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""Drive full games through the REST routes at a set concurrency and measure one server.
+
+Each virtual player plays whole games over its own keep-alive connection
+and cookie jar: /new_game, /place_ships, then its moves through
+/player_shoot, /player_air_strike and /use_powerup until the game ends, with
+a /get_game_state every few moves as a reloading page would. Moves come
+from recorded games (an event log directory, or a JSON-lines file written
+by --write-streams) or from synthetic streams with random fleets, random
+firing orders and an air strike now and then. A recorded game played
+against a new AI fleet can end sooner or later than it did; its stream is
+topped up with random shots at open cells. Moves carry move ids, and
+moves turned away by a busy server (503) are resent after their
+Retry-After, as the browser does.
+
+Every few seconds, and at the end, it reports completed games and
+requests per second, latency percentiles per route, errors, and the
+server's resident memory, so its growth over the run shows. By default
+the server is app.py started on a free localhost port with its data
+directories in a temporary directory; --url points at a server already
+running on this machine instead (with --pid to follow its memory). Only
+localhost is accepted: the load generator shares the machine with the
+server, so its own CPU time is reported too.
+
+Usage: python -m benchmarks.load [--concurrency 8] [--duration 30 | --games N] [--difficulty medium]
+                                 [--streams DIR_OR_FILE] [--write-streams FILE] [--url URL [--pid PID]]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import urllib.parse
+import uuid
+
+import event_log
+from benchmarks.strategies import random_fleet
+from tools.local_server import rss_bytes, running_server
+
+GRID_SIZE = 10
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+ROUTES = ("/new_game", "/place_ships", "/player_shoot", "/player_air_strike", "/use_powerup", "/get_game_state")
+
+# Chance that a synthetic move is an air strike on a random row or column
+AIR_STRIKE_RATE = 0.05
+
+# Times a move turned away as busy is resent before it counts as an error
+BUSY_RETRIES = 3
+
+
+# Move streams: {"difficulty", "ships": [{"row", "col", "direction"}, ...], "moves": [move, ...]}
+# with moves ["shot", row, col], ["air", "row" or "column", index] or ["pu", name, row, col, direction]
+
+def synthetic_stream(rng, difficulty):
+    cells = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE)]
+    rng.shuffle(cells)
+    moves = []
+    for row, col in cells:
+        if rng.random() < AIR_STRIKE_RATE:
+            moves.append(["air", rng.choice(["row", "column"]), rng.randrange(GRID_SIZE)])
+        moves.append(["shot", row, col])
+    return {"difficulty": difficulty, "ships": random_fleet(rng, GRID_SIZE), "moves": moves}
+
+
+def recorded_streams(directory):
+    """The player's side of every game in an event log that placed a fleet"""
+    from powerups import by_index
+
+    streams = []
+    for events in event_log.events_by_game(directory).values():
+        _, difficulty, _ = event_log.decode_new_game(events[0][1])
+        stream = {"difficulty": difficulty, "ships": None, "moves": []}
+        for event_type, payload in events[1:]:
+            if event_type == event_log.PLACEMENT:
+                side, layout = event_log.decode_placement(payload)
+                if side == event_log.PLAYER:
+                    stream["ships"] = [{"row": r, "col": c, "direction": d} for r, c, d in layout]
+            elif event_type == event_log.SHOT:
+                stream["moves"].append(["shot", payload[0], payload[1]])
+            elif event_type == event_log.AIR_STRIKE:
+                stream["moves"].append(["air", "row" if payload[0] == 0 else "column", payload[1]])
+            elif event_type == event_log.POWERUP and payload[0] == event_log.PLAYER:
+                _, index, row, col, vertical = payload
+                stream["moves"].append(["pu", by_index(index).name, row, col, "V" if vertical else "H"])
+        if stream["ships"] is not None:
+            streams.append(stream)
+    return streams
+
+
+def load_streams(source):
+    if os.path.isdir(source):
+        return recorded_streams(source)
+    with open(source) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Stats:
+    """Latencies and counts shared by the virtual players"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {route: [] for route in ROUTES}
+        self.interval = []  # Latencies since the last progress line
+        self.requests = 0
+        self.errors = {}  # Kind (HTTP status, "app" for a status=error reply, or exception name) -> count
+        self.busy = 0
+        self.games = 0
+        self.moves = 0
+
+    def record(self, route, seconds, error=None):
+        with self.lock:
+            self.latencies[route].append(seconds)
+            self.interval.append(seconds)
+            self.requests += 1
+            if error is not None:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+
+class Player:
+    """One browser: a keep-alive connection, its cookies and the game it is playing"""
+
+    def __init__(self, host, port, stats):
+        self.host, self.port = host, port
+        self.stats = stats
+        self.cookies = {}
+        self.conn = None
+
+    def request(self, method, route, body=None):
+        """Send a request and return its JSON reply, or None if it failed"""
+        payload = json.dumps(body) if body is not None else None
+        for attempt in range(BUSY_RETRIES + 1):
+            headers = {"Content-Type": "application/json"}
+            if self.cookies:
+                headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+            start = time.perf_counter()
+            try:
+                if self.conn is None:
+                    self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                self.conn.request(method, route, payload, headers)
+                response = self.conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self.stats.record(route, time.perf_counter() - start, type(e).__name__)
+                self.conn.close()
+                self.conn = None
+                return None
+            elapsed = time.perf_counter() - start
+
+            for header in response.headers.get_all("Set-Cookie") or []:
+                name, _, value = header.split(";", 1)[0].partition("=")
+                self.cookies[name.strip()] = value
+            if response.status == 503 and attempt < BUSY_RETRIES:
+                self.stats.record(route, elapsed, 503)
+                with self.stats.lock:
+                    self.stats.busy += 1
+                time.sleep(float(response.getheader("Retry-After") or 1))
+                continue
+            if response.status != 200:
+                self.stats.record(route, elapsed, response.status)
+                return None
+            reply = json.loads(data)
+            self.stats.record(route, elapsed, "app" if reply.get("status") != "success" else None)
+            return reply
+
+    def play(self, stream, rng, state_every):
+        """Play one game from a move stream; returns whether it reached the end"""
+        if self.request("POST", "/new_game", {"difficulty": stream["difficulty"]}) is None:
+            return False
+        reply = self.request("POST", "/place_ships", {"ships": stream["ships"]})
+        if reply is None or reply["status"] != "success":
+            return False
+
+        open_cells = {(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE)}
+        air_strike_ready = reply["gameState"]["airStrikeAvailable"]
+        moves = iter(stream["moves"])
+        for count in range(1, 3 * GRID_SIZE * GRID_SIZE):
+            move = next(moves, None)
+            if move is None:
+                # The recording ran out before this game ended: fire at random
+                move = ["shot", *rng.choice(sorted(open_cells))]
+            elif move[0] == "shot" and (move[1], move[2]) not in open_cells:
+                continue
+            elif move[0] == "air" and not air_strike_ready:
+                continue
+
+            move_id = str(uuid.uuid4())
+            if move[0] == "shot":
+                reply = self.request("POST", "/player_shoot", {"row": move[1], "col": move[2], "moveId": move_id})
+            elif move[0] == "air":
+                reply = self.request("POST", "/player_air_strike",
+                                     {"targetType": move[1], "targetIndex": move[2], "moveId": move_id})
+            else:
+                reply = self.request("POST", "/use_powerup", {"powerUp": move[1], "row": move[2], "col": move[3],
+                                                              "direction": move[4], "moveId": move_id})
+            with self.stats.lock:
+                self.stats.moves += 1
+            if reply is None:
+                return False
+
+            state = reply.get("gameState")
+            if state is not None:
+                if state["gameOver"]:
+                    return True
+                open_cells = {(r, c) for r, row in enumerate(state["playerShots"])
+                              for c, shot in enumerate(row) if shot is None}
+                air_strike_ready = state["airStrikeAvailable"]
+            if state_every and count % state_every == 0:
+                self.request("GET", "/get_game_state")
+        return False
+
+
+def percentiles(values):
+    """(p50, p90, p99, max) in milliseconds"""
+    if not values:
+        return (0.0,) * 4
+    if len(values) == 1:
+        return (values[0] * 1e3,) * 4
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return q[49] * 1e3, q[89] * 1e3, q[98] * 1e3, max(values) * 1e3
+
+
+def mib(value):
+    return f"{value / 2**20:.1f} MiB" if value is not None else "n/a"
+
+
+def run(host, port, pid, args, streams):
+    stats = Stats()
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    games_left = [args.games] if args.games else None
+    claim = threading.Lock()
+
+    def next_game():
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if games_left is not None:
+            with claim:
+                if games_left[0] <= 0:
+                    return False
+                games_left[0] -= 1
+        return True
+
+    def worker(index):
+        rng = random.Random(args.seed * 1000 + index)
+        player = Player(host, port, stats)
+        while next_game():
+            # A new player (and cookie jar) now and then, as new visitors arrive
+            if rng.random() < args.new_player_rate:
+                player.cookies.clear()
+            stream = rng.choice(streams) if streams else synthetic_stream(rng, args.difficulty)
+            if player.play(stream, rng, args.state_every):
+                with stats.lock:
+                    stats.games += 1
+
+    rss_start = rss_bytes(pid) if pid else None
+    rss_peak = rss_start or 0
+    cpu_start = time.process_time()
+    start = last = time.perf_counter()
+    last_requests = last_games = 0
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+
+    print(f"{'time':>6} {'games':>7} {'games/s':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'server RSS':>12}")
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=max(0.0, last + args.report_interval - time.perf_counter()))
+        now = time.perf_counter()
+        if now - last < args.report_interval:
+            continue
+        with stats.lock:
+            interval, stats.interval = stats.interval, []
+            requests, games, errors = stats.requests, stats.games, sum(stats.errors.values())
+        rss = rss_bytes(pid) if pid else None
+        rss_peak = max(rss_peak, rss or 0)
+        p50, _, p99, _ = percentiles(interval)
+        print(f"{now - start:>5.0f}s {games:>7} {(games - last_games) / (now - last):>8.1f} "
+              f"{(requests - last_requests) / (now - last):>8.0f} {p50:>8.1f} {p99:>8.1f} {errors:>7} {mib(rss):>12}")
+        last, last_requests, last_games = now, requests, games
+
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    rss_end = rss_bytes(pid) if pid else None
+
+    print(f"\n{args.concurrency} players, {elapsed:.1f} s: {stats.games} games ({stats.games / elapsed:.1f}/s), "
+          f"{stats.moves} moves, {stats.requests} requests ({stats.requests / elapsed:.0f}/s)")
+    print(f"{'route':<20} {'requests':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route, values in stats.latencies.items():
+        if values:
+            print(f"{route:<20} {len(values):>9} " + " ".join(f"{v:>8.1f}" for v in percentiles(values)))
+    if stats.errors:
+        print("errors: " + ", ".join(f"{kind}: {count}" for kind, count in sorted(stats.errors.items(), key=str)))
+    if stats.busy:
+        print(f"moves resent after a busy reply: {stats.busy}")
+    if rss_start is not None and rss_end is not None:
+        growth = rss_end - rss_start
+        per_game = f", {growth / stats.games / 1024:.1f} KiB per game" if stats.games else ""
+        print(f"server RSS: {mib(rss_start)} -> {mib(rss_end)} (peak {mib(max(rss_peak, rss_end))}), "
+              f"growth {mib(growth)}{per_game}")
+    print(f"load generator CPU: {cpu:.1f} s ({cpu / elapsed:.0%} of one core)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="virtual players playing at once")
+    parser.add_argument("--duration", type=float, help="seconds to run (default 30 unless --games is given)")
+    parser.add_argument("--games", type=int, help="games to play in total")
+    parser.add_argument("--difficulty", default="medium", help="difficulty of synthetic games")
+    parser.add_argument("--streams", help="replay move streams from an event log directory or a JSON-lines file")
+    parser.add_argument("--write-streams", metavar="FILE", help="write the synthetic streams used to FILE")
+    parser.add_argument("--state-every", type=int, default=10, help="moves between /get_game_state calls (0: never)")
+    parser.add_argument("--new-player-rate", type=float, default=0.2,
+                        help="chance a game is played by a new visitor (fresh cookies)")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="an app.py already running on localhost")
+    parser.add_argument("--pid", type=int, help="process id of the --url server, to follow its memory")
+    args = parser.parse_args()
+    if not args.duration and not args.games:
+        args.duration = 30
+
+    streams = load_streams(args.streams) if args.streams else None
+    if args.streams and not streams:
+        raise SystemExit(f"No playable games in {args.streams}")
+    if args.write_streams:
+        rng = random.Random(args.seed)
+        streams = [synthetic_stream(rng, args.difficulty) for _ in range(args.games or 100)]
+        with open(args.write_streams, "w") as f:
+            f.writelines(json.dumps(stream, separators=(",", ":")) + "\n" for stream in streams)
+
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        if url.hostname not in LOCAL_HOSTS:
+            raise SystemExit("The load generator only targets servers on localhost")
+        run(url.hostname, url.port or 80, args.pid, args, streams)
+        return
+
+    # A throwaway server, so the run leaves nothing behind in data/
+    with running_server() as (base_url, proc):
+        url = urllib.parse.urlsplit(base_url)
+        run(url.hostname, url.port, proc.pid, args, streams)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measure the memory held by live games.
+
+Creates N games with fleets placed and some moves played, the way they sit in
+game_sessions between requests, and reports the growth in resident memory per
+game along with the size of each game's snapshot file. Each round's
+games are kept alive so the next round's growth is not hidden by reused memory.
+
+Usage: python -m benchmarks.memory [--games 10000 100000] [--moves 10] [--difficulty easy]
+"""
+import argparse
+import gc
+import os
+import random
+import time
+import uuid
+
+import recovery
+from game import BattleshipGame
+from tools.local_server import rss_bytes
+
+FLEET = [{"row": i * 2, "col": 0, "direction": "H"} for i in range(5)]
+
+
+def make_game(difficulty, moves, rng):
+    game = BattleshipGame(difficulty, game_id=str(uuid.UUID(int=rng.getrandbits(128))))
+    game.validate_player_ship_placement(FLEET)
+    cells = [(r, c) for r in range(game.size) for c in range(game.size)]
+    rng.shuffle(cells)
+    for row, col in cells[:moves]:
+        if game.game_over:
+            break
+        game.player_shoot(row, col)
+        if game.current_turn == "ai" and not game.game_over:
+            game.ai_shoot()
+    return game
+
+
+def measure(count, moves, difficulty):
+    rng = random.Random(count)
+    gc.collect()
+    before = rss_bytes(os.getpid())
+    start = time.perf_counter()
+    games = {}
+    for _ in range(count):
+        game = make_game(difficulty, moves, rng)
+        games[game.game_id] = game
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    grown = rss_bytes(os.getpid()) - before
+
+    snapshot_bytes = len(recovery.encode_snapshot(next(iter(games.values())).to_snapshot()))
+    print(f"{count:>7} games: {grown / count:>7,.0f} B/game resident ({grown / 2**20:,.1f} MiB), "
+          f"snapshot {snapshot_bytes} B, built in {elapsed:.1f}s")
+    return games
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--moves", type=int, default=10, help="player shots per game (each answered by the AI)")
+    parser.add_argument("--difficulty", default="easy")
+    args = parser.parse_args()
+
+    # Earlier rounds stay alive so later ones cannot reuse their freed memory
+    kept = []
+    for count in args.games:
+        kept.append(measure(count, args.moves, args.difficulty))
+
+
+if __name__ == "__main__":
+    main()
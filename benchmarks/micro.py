@@ -0,0 +1,306 @@
+"""Micro-benchmarks of the engine's hot paths, with a regression gate.
+
+Times each operation on fixed positions for every board size and game
+phase (opening: nothing fired yet; midgame: each side has fired at a third
+of the board; endgame: the player has one ship left):
+
+  place_ships_random             random fleet placement
+  validate_player_ship_placement the player's fleet from the frontend
+  density_map                    the AI's probability map (TurnContext plus the density stage)
+  best_target                    picking the top cell of a finished probability map
+  choose_target:STRATEGY         the AI's choice of cell to fire at, for each strategy
+  is_ship_sunk                   the sink check for every cell of the player's fleet (a damage counter lookup each)
+  player_air_strike              an air strike across the middle row
+  get_game_state                 the frontend's game state, serialized to JSON
+
+Timings shift by tens of percent between interpreter processes (hash
+seeds, memory layout), so every operation is measured in PROCESSES fresh
+interpreters, one after another, each with its own hash seed. Each result
+is the median over the processes of each one's median repeat, in seconds
+per call, along with its spread: the median absolute deviation, as a
+fraction of the median, across processes or across one process's repeats,
+whichever is larger. The results are compared with a baseline file
+kept in the repository, after scaling by two calibration workloads timed in
+the same run, one pure Python and one NumPy, so a baseline recorded on one
+machine still means something on another. An operation fails the run (exit
+status 1) when it is slower than the baseline by more than the threshold
+plus NOISE_SIGMAS times the spread recorded with the baseline, so noisy
+operations get more room. The noise allowance comes from the baseline, not
+the run being checked, so a regression that also adds noise can't widen
+its own allowance, and it is capped at MAX_NOISE times the threshold. The lookahead strategy's transposition table
+is cleared before each call, so it is timed computing its move rather than
+looking it up. Run with --save after a deliberate change in cost to record
+a new baseline.
+
+Usage: python -m benchmarks.micro [--sizes 10 15] [-k FILTER] [--processes 3] [--threshold 0.25] [--save]
+                                  [--baseline FILE]
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import lookahead
+import strategies
+from benchmarks.strategies import random_fleet
+from game import GRID_SIZE, BattleshipGame
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+PHASES = ("opening", "midgame", "endgame")
+
+# Share of the board each side has fired at in the midgame position
+MIDGAME_SHOTS = 1 / 3
+
+# Seconds each timed batch should take, and the batches per operation
+MIN_BATCH = 0.02
+REPEATS = 7
+
+# Baseline spreads added to the threshold before an operation counts as
+# regressed, at most MAX_NOISE thresholds' worth
+NOISE_SIGMAS = 3
+MAX_NOISE = 2
+
+# Interpreter processes each operation is measured in
+PROCESSES = 3
+
+
+def calibrate():
+    """Seconds for fixed pure-Python and NumPy workloads, the units results are scaled by"""
+    def python_work():
+        total = 0
+        for i in range(20_000):
+            total += i * i % 7
+        return total
+
+    grid = np.random.default_rng(0).random((15, 15))
+    def numpy_work():
+        total = np.zeros((15, 15))
+        for length in (2, 3, 4, 5):
+            total[:, :16 - length] += grid[:, :16 - length] * length
+            total[:16 - length, :] += grid[:16 - length, :] * length
+        return int(np.argmax(total))
+
+    return {"python": timed(python_work)[0], "numpy": timed(numpy_work)[0]}
+
+
+def scale_factor(calibration, baseline_calibration):
+    """How much slower the baseline's machine was than this one, averaged over both workloads"""
+    ratios = [baseline_calibration[name] / calibration[name] for name in calibration]
+    return statistics.geometric_mean(ratios)
+
+
+def timed(call, prepare=None):
+    """(median seconds per call, relative spread) over REPEATS batches.
+
+    With prepare, each call gets a fresh argument from prepare(), made
+    outside the timed loop, for operations that change what they run on.
+    """
+    number = 1
+    while True:
+        args = [prepare() if prepare else None for _ in range(number)]
+        start = time.perf_counter()
+        for arg in args:
+            call(arg) if prepare else call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_BATCH:
+            break
+        number = number * 2 if elapsed == 0 else max(number * 2, int(number * MIN_BATCH / elapsed * 1.2))
+
+    samples = [elapsed / number]
+    for _ in range(REPEATS - 1):
+        args = [prepare() if prepare else None for _ in range(number)]
+        start = time.perf_counter()
+        for arg in args:
+            call(arg) if prepare else call()
+        samples.append((time.perf_counter() - start) / number)
+
+    return median_spread(samples)
+
+
+def median_spread(samples):
+    """(median, median absolute deviation as a fraction of the median)"""
+    median = statistics.median(samples)
+    deviation = statistics.median(abs(sample - median) for sample in samples)
+    return median, deviation / median if median else 0.0
+
+
+def choose_cold(game, strategy):
+    """The strategy's choice with an empty transposition table, as on a position not seen before"""
+    lookahead.TABLE.clear()
+    return strategy.choose(strategies.TurnContext(game))
+
+
+def position(size, phase, seed=0):
+    """A game in the given phase, reached by the player firing at random and the medium AI replying"""
+    while True:
+        rng = random.Random(seed)
+        game = BattleshipGame(strategy="medium", seed=seed, size=size)
+        game.validate_player_ship_placement(random_fleet(rng, size))
+        cells = list(range(size * size))
+        rng.shuffle(cells)
+
+        for cell in cells:
+            if phase == "opening":
+                return game
+            if phase == "midgame" and len(game.ai_moves) >= size * size * MIDGAME_SHOTS:
+                return game
+            if phase == "endgame" and len(game.remaining_player_ships) == 1:
+                return game
+            game.player_shoot(*divmod(cell, size))
+            if game.game_over:
+                break
+            game.ai_shoot()
+            if game.game_over:
+                break
+        seed += 1  # This game ended before reaching the phase; try another
+
+
+def operations(size):
+    """(name, phase, call, prepare) for every operation on a board size"""
+    fleet = random_fleet(random.Random(size), size)
+    game = BattleshipGame(seed=size, size=size)
+    yield "place_ships_random", None, lambda: game.place_ships_random(bytearray(size * size)), None
+    yield "validate_player_ship_placement", None, lambda: game.validate_player_ship_placement(fleet), None
+
+    for phase in PHASES:
+        game = position(size, phase)
+        ctx = strategies.TurnContext(game)
+        strategies.density(ctx)
+
+        yield "density_map", phase, lambda game=game: strategies.density(strategies.TurnContext(game)), None
+        yield "best_target", phase, lambda ctx=ctx: strategies.best(ctx), None
+        for name, strategy in strategies.STRATEGIES.items():
+            yield (f"choose_target:{name}", phase,
+                   lambda game=game, strategy=strategy: choose_cold(game, strategy), None)
+        yield ("is_ship_sunk", phase,
+               lambda game=game: [game.is_ship_sunk(game.player_fleet, cell) for cell in range(size * size)], None)
+        yield ("player_air_strike", phase, lambda fresh: fresh.player_air_strike("row", size // 2),
+               lambda game=game: copy.deepcopy(game))
+        yield "get_game_state", phase, lambda game=game: json.dumps(game.get_game_state()), None
+
+
+def key(name, size, phase):
+    return "/".join(filter(None, [name, str(size), phase]))
+
+
+def run(sizes, pattern=None):
+    """{key: (seconds per call, spread)} for every operation whose key contains pattern"""
+    results = {}
+    for size in sizes:
+        for name, phase, call, prepare in operations(size):
+            k = key(name, size, phase)
+            if pattern and pattern not in k:
+                continue
+            results[k] = timed(call, prepare)
+    return results
+
+
+def measure(sizes, pattern=None):
+    """Calibration and results of one process"""
+    return {"calibration": calibrate(), "results": run(sizes, pattern)}
+
+
+def measure_processes(sizes, pattern, processes):
+    """Calibration and results combined over fresh interpreter processes"""
+    runs = []
+    for seed in range(processes):
+        command = [sys.executable, "-m", "benchmarks.micro", "--worker", "--sizes", *map(str, sizes)]
+        if pattern:
+            command += ["-k", pattern]
+        env = dict(os.environ, PYTHONHASHSEED=str(seed))
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output))
+
+    calibration = {name: statistics.median(run["calibration"][name] for run in runs) for name in runs[0]["calibration"]}
+    results = {}
+    for k in runs[0]["results"]:
+        seconds, between = median_spread([run["results"][k][0] for run in runs])
+        within = statistics.median(run["results"][k][1] for run in runs)
+        results[k] = (seconds, max(between, within))
+    return calibration, results
+
+
+def compare(results, calibration, baseline, threshold):
+    """Print each result against the baseline; returns the keys that regressed"""
+    regressed = []
+    base_results = baseline["results"] if baseline else {}
+    base_spreads = baseline.get("spreads", {}) if baseline else {}
+    scale = scale_factor(calibration, baseline["calibration"]) if baseline else 1.0
+    width = max(map(len, results))
+    for k, (seconds, spread) in results.items():
+        line = f"{k:<{width}} {seconds * 1e6:>10.2f} us {spread:>6.1%}"
+        if k in base_results:
+            # The baseline's time, as it would be on this machine
+            expected = base_results[k] / scale
+            change = seconds / expected - 1
+            allowed = threshold + min(NOISE_SIGMAS * base_spreads.get(k, 0.0), MAX_NOISE * threshold)
+            line += f"  baseline {expected * 1e6:>10.2f} us  {change:+7.1%} (allowed {allowed:+.0%})"
+            if change > allowed:
+                line += "  REGRESSED"
+                regressed.append(k)
+        elif baseline:
+            line += "  (new)"
+        print(line)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[GRID_SIZE, 15])
+    parser.add_argument("-k", dest="pattern", help="only operations whose key (op/size/phase) contains this")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown beyond measurement noise, as a fraction")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--processes", type=int, default=PROCESSES, help="interpreter processes to measure in")
+    parser.add_argument("--save", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # One measuring process of measure_processes: results go to stdout as JSON
+        json.dump(measure(args.sizes, args.pattern), sys.stdout)
+        return
+
+    calibration, results = measure_processes(args.sizes, args.pattern, args.processes)
+
+    baseline = None
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print("calibration " + ", ".join(f"{name} {seconds * 1e3:.3f} ms" for name, seconds in calibration.items()) +
+          (f" (baseline machine {scale_factor(calibration, baseline['calibration']):.2f}x this one)"
+           if baseline else ""))
+    regressed = compare(results, calibration, baseline, args.threshold)
+
+    if args.save:
+        saved = {"results": {}, "spreads": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                saved = json.load(f)
+            # Keep the other operations' baselines, rescaled to this run's calibration
+            scale = scale_factor(calibration, saved["calibration"])
+            saved["results"] = {k: v / scale for k, v in saved["results"].items()}
+        saved["calibration"] = calibration
+        saved["python"] = platform.python_version()
+        saved["results"].update((k, seconds) for k, (seconds, _) in results.items())
+        saved.setdefault("spreads", {}).update((k, spread) for k, (_, spread) in results.items())
+        with open(args.baseline, "w") as f:
+            json.dump(saved, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"saved {len(results)} results to {args.baseline}")
+    elif regressed:
+        print(f"{len(regressed)} operation(s) slower than the baseline by more than {args.threshold:.0%} plus their noise")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
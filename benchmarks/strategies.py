@@ -0,0 +1,91 @@
+"""Time each stage of the AI strategies and measure how well they play.
+
+Plays games AI-only against random fleets. On every AI turn, each stage of
+the game's strategy is timed as the pipeline runs it, so later stages are
+only counted on the turns they are reached. Reports per-stage cost and how
+often each stage picked the shot, then mean shots to sink a fleet, split
+into hunt shots (no unsunk ship has been hit) and target shots, and the
+mean, median and 99th percentile time per AI move.
+
+Usage: python -m benchmarks.strategies [--games 50] [STRATEGY ...]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import strategies
+from game import SHIP_SIZES, BattleshipGame
+
+
+def random_fleet(rng, size):
+    taken = set()
+    ships = []
+    for length in SHIP_SIZES:
+        while True:
+            direction = rng.choice("HV")
+            row, col = rng.randrange(size), rng.randrange(size)
+            step = 1 if direction == "H" else size
+            end = (col if direction == "H" else row) + length
+            cells = {row * size + col + step * i for i in range(length)}
+            if end <= size and not cells & taken:
+                taken |= cells
+                ships.append({"row": row, "col": col, "direction": direction})
+                break
+    return ships
+
+
+def timed_choose(strategy, ctx, stats):
+    """Strategy.choose, recording [calls, picks, seconds] per stage"""
+    for stage in strategy.stages:
+        start = time.perf_counter()
+        cell = stage(ctx)
+        entry = stats.setdefault(stage.__name__, [0, 0, 0.0])
+        entry[0] += 1
+        entry[2] += time.perf_counter() - start
+        if cell is not None:
+            entry[1] += 1
+            return cell
+    return ctx.rng.choice(ctx.open_cells)
+
+
+def run(name, games):
+    strategy = strategies.get(name)
+    stats = {}
+    shots = []
+    hunt_shots = 0
+    turn_times = []
+    for seed in range(games):
+        game = BattleshipGame(strategy=name, seed=seed)
+        game.validate_player_ship_placement(random_fleet(random.Random(seed), game.size))
+        while not game.game_over:
+            hunt_shots += not game.ai_open_hits
+            start = time.perf_counter()
+            ctx = strategies.TurnContext(game)
+            cell = timed_choose(strategy, ctx, stats)
+            turn_times.append(time.perf_counter() - start)
+            game.current_turn = "ai"
+            game.resolve_ai_shot(*divmod(cell, game.size))
+        shots.append(len(game.ai_moves))
+
+    turns = sum(shots)
+    percentiles = statistics.quantiles(turn_times, n=100)
+    print(f"{name}: {statistics.mean(shots):.1f} shots to win (median {statistics.median(shots)}), "
+          f"{statistics.mean(turn_times) * 1e6:.0f} us/turn (p50 {percentiles[49] * 1e6:.0f}, p99 {percentiles[98] * 1e6:.0f})")
+    print(f"  hunt {hunt_shots / games:.1f} + target {(turns - hunt_shots) / games:.1f} shots per game")
+    for stage, (calls, picks, seconds) in stats.items():
+        print(f"  {stage:<28} {seconds / calls * 1e6:>7.1f} us  reached {calls / turns:>4.0%}  picked {picks / turns:>4.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("strategies", nargs="*", default=list(strategies.STRATEGIES))
+    parser.add_argument("--games", type=int, default=50)
+    args = parser.parse_args()
+
+    for name in args.strategies:
+        run(name, args.games)
+
+
+if __name__ == "__main__":
+    main()
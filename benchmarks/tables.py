@@ -0,0 +1,100 @@
+"""Measure building, loading and sharing the AI table file (see tables.py).
+
+Reports how long the tables take to build and to write, how long mapping
+the file takes, and then starts several worker-like processes at once,
+each importing the AI modules and requesting every table, first building
+them itself and then mapping a shared file. For each way it reports the
+time to warm a process, and each process's resident (RSS) and
+proportional (PSS, shared pages split between the processes using them)
+memory, from /proc (Linux only).
+
+Usage: python -m benchmarks.tables [--workers 4] [--size 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import tables
+from board import GRID_SIZE
+from tools.build_tables import build
+
+WORKER = """
+import sys, time
+start = time.perf_counter()
+import tables
+if sys.argv[1]:
+    assert tables.open_file(sys.argv[1])
+from tools.build_tables import build
+build(int(sys.argv[2]))
+print(time.perf_counter() - start, flush=True)
+sys.stdin.read()
+"""
+
+
+def memory(pid):
+    """(RSS, PSS) of a process in KiB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1])
+    return values["Rss:"], values["Pss:"]
+
+
+def workers(count, path, size):
+    """Start count processes together; returns their warm-up seconds and (RSS, PSS)"""
+    procs = [
+        subprocess.Popen([sys.executable, "-c", WORKER, path or "", str(size)],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(count)
+    ]
+    try:
+        warm = [float(proc.stdout.readline()) for proc in procs]
+        usage = [memory(proc.pid) for proc in procs]
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+    return warm, usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--size", type=int, default=GRID_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with tables.recording() as built:
+        build(args.size)
+    build_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tables.bin")
+        start = time.perf_counter()
+        tables.write(path, built)
+        write_time = time.perf_counter() - start
+
+        loads = []
+        for _ in range(50):
+            start = time.perf_counter()
+            tables.load(path)
+            loads.append(time.perf_counter() - start)
+
+        print(f"{len(built)} tables, {os.path.getsize(path) / 1024:.0f} KiB: build {build_time * 1000:.1f} ms, "
+              f"write {write_time * 1000:.1f} ms, map {statistics.mean(loads) * 1000:.2f} ms")
+
+        for label, table_file in (("built per process", None), ("mapped file", path)):
+            warm, usage = workers(args.workers, table_file, args.size)
+            print(f"{label:<18} {args.workers} processes: warm {statistics.mean(warm) * 1000:.0f} ms, "
+                  f"RSS {statistics.mean(rss for rss, _ in usage) / 1024:.1f} MiB, "
+                  f"PSS {statistics.mean(pss for _, pss in usage) / 1024:.1f} MiB per process")
+
+
+if __name__ == "__main__":
+    main()
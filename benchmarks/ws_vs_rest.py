@@ -0,0 +1,76 @@
+"""Compare turn throughput of the WebSocket channel against the REST routes.
+
+Plays the same games (same fleets and firing orders) once through
+POST /player_shoot and once through /game_ws against a local server process,
+then reports shots per wall-clock second and per server CPU-second (per core).
+
+Usage: python -m benchmarks.ws_vs_rest [--games 20] [--difficulty medium]
+"""
+import argparse
+import http.client
+import json
+import time
+import urllib.parse
+
+from tools.local_server import cpu_seconds, running_server
+from tools.ws_client import play_ws_game, shot_order, start_game
+
+
+def play_rest_game(base_url, cookie, cells):
+    """Play a game over POST /player_shoot and return (shots sent, winner)"""
+    url = urllib.parse.urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port)
+    headers = {"Content-Type": "application/json", "Cookie": cookie}
+    shots = 0
+    winner = None
+    try:
+        for row, col in cells:
+            conn.request("POST", "/player_shoot", json.dumps({"row": row, "col": col}), headers)
+            data = json.loads(conn.getresponse().read())
+            shots += 1
+            state = data.get("gameState") or {}
+            if state.get("gameOver"):
+                winner = state["winner"]
+                break
+    finally:
+        conn.close()
+    return shots, winner
+
+
+def run(base_url, proc, transport, games, difficulty):
+    play = play_rest_game if transport == "rest" else play_ws_game
+    cookies = [start_game(base_url, difficulty) for _ in range(games)]
+
+    cpu_start = cpu_seconds(proc.pid)
+    start = time.perf_counter()
+    total = 0
+    for i, cookie in enumerate(cookies):
+        shots, _ = play(base_url, cookie, shot_order(i))
+        total += shots
+    elapsed = time.perf_counter() - start
+    cpu_end = cpu_seconds(proc.pid)
+
+    cpu = cpu_end - cpu_start if cpu_start is not None else None
+    return total, elapsed, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--difficulty", default="medium")
+    args = parser.parse_args()
+
+    with running_server() as (base_url, proc):
+        # Warm up both paths before measuring
+        run(base_url, proc, "rest", 1, args.difficulty)
+        run(base_url, proc, "ws", 1, args.difficulty)
+
+        print(f"{'transport':<10} {'shots':>7} {'shots/s':>10} {'shots/cpu-s':>12}")
+        for transport in ("rest", "ws"):
+            total, elapsed, cpu = run(base_url, proc, transport, args.games, args.difficulty)
+            per_core = f"{total / cpu:12.0f}" if cpu else f"{'n/a':>12}"
+            print(f"{transport:<10} {total:>7} {total / elapsed:>10.0f} {per_core}")
+
+
+if __name__ == "__main__":
+    main()
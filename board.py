@@ -0,0 +1,117 @@
+from array import array
+from functools import lru_cache
+
+# Constants
+GRID_SIZE = 10
+SHIP_SIZES = [5, 4, 3, 3, 2]
+SHIP_NAMES = ["Carrier", "Battleship", "Cruiser", "Submarine", "Destroyer"]
+SHIP_CHARS = [name[0] for name in SHIP_NAMES]
+TOTAL_SHIP_PARTS = sum(SHIP_SIZES)
+
+# Boards are flat byte arrays indexed by row * size + col.
+# Fleet arrays hold 0 for water or ship index + 1; shot arrays hold one of:
+UNSHOT = 0
+MISS = 1
+HIT = 2
+
+
+@lru_cache(maxsize=None)
+def ship_placements(size, length):
+    """Every on-board placement of a ship on a size x size board, as (cell bitmask, cells).
+
+    Shared by all games, so a placement can be rejected with one AND against a
+    bitmask of misses instead of a scan over its cells.
+    """
+    placements = []
+    for r in range(size):
+        for c in range(size - length + 1):
+            placements.append(range(r * size + c, r * size + c + length))
+    for r in range(size - length + 1):
+        for c in range(size):
+            placements.append(range(r * size + c, (r + length) * size + c, size))
+    return tuple((sum(1 << i for i in cells), tuple(cells)) for cells in placements)
+
+
+@lru_cache(maxsize=None)
+def neighbours(size):
+    """Orthogonal on-board neighbours of every cell, in up, down, left, right order"""
+    table = []
+    for cell in range(size * size):
+        r, c = divmod(cell, size)
+        adjacent = []
+        if r > 0:
+            adjacent.append(cell - size)
+        if r < size - 1:
+            adjacent.append(cell + size)
+        if c > 0:
+            adjacent.append(cell - 1)
+        if c < size - 1:
+            adjacent.append(cell + 1)
+        table.append(tuple(adjacent))
+    return tuple(table)
+
+
+def fire(shots, fleet, damage, cells, stop_at_hit=False):
+    """Fire at every unshot cell of cells (any iterable of cell indices) in one pass.
+
+    Marks hits and misses on shots and adds each hit to its ship's damage
+    counter; with stop_at_hit, the volley ends at its first hit. Returns
+    (cells fired at, cells hit, cells whose hit sank a ship); the cost
+    depends only on how many cells are fired at, so area weapons of any
+    shape share it.
+    """
+    fired = []
+    hits = []
+    sunk = []
+    for i in cells:
+        if shots[i] != UNSHOT:
+            continue
+        fired.append(i)
+        ship = fleet[i] - 1
+        if ship < 0:
+            shots[i] = MISS
+            continue
+        shots[i] = HIT
+        hits.append(i)
+        damage[ship] += 1
+        if damage[ship] == SHIP_SIZES[ship]:
+            sunk.append(i)
+        if stop_at_hit:
+            break
+    return fired, hits, sunk
+
+
+def ship_cells(fleet, size, cell):
+    """Cells of the ship covering cell, found by walking along it from there"""
+    value = fleet[cell]
+    c = cell % size
+    if (c > 0 and fleet[cell - 1] == value) or (c < size - 1 and fleet[cell + 1] == value):
+        start, end = cell, cell
+        while start % size > 0 and fleet[start - 1] == value:
+            start -= 1
+        while end % size < size - 1 and fleet[end + 1] == value:
+            end += 1
+        return range(start, end + 1)
+    start, end = cell, cell
+    while start >= size and fleet[start - size] == value:
+        start -= size
+    while end + size < len(fleet) and fleet[end + size] == value:
+        end += size
+    return range(start, end + 1, size)
+
+
+@lru_cache(maxsize=None)
+def _bit_table(value):
+    """bytes.translate table mapping value to "1" and every other byte to "0"""
+    return bytes(ord("1") if v == value else ord("0") for v in range(256))
+
+
+def cells_with(board, value):
+    """Bitmask of the cells of a board holding value"""
+    # Cell 0 is the lowest bit, so reverse the digits before parsing them as binary
+    return int(board.translate(_bit_table(value))[::-1], 2)
+
+
+def cell_log(size):
+    """Empty, growable list of cell indices; one byte per entry on boards up to 16x16"""
+    return bytearray() if size * size <= 256 else array('H')
@@ -0,0 +1,102 @@
+import json
+import queue
+import threading
+
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_INTERVAL = 15
+
+# Events buffered per subscriber before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+class GameChannel:
+    """Fan-out of game events to every subscriber of one game"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def subscribe(self):
+        """Register a new subscriber and return its event queue"""
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+
+    def publish(self, event, data):
+        """Queue an event for every subscriber of this game"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for q in subscribers:
+            try:
+                q.put_nowait((event, data))
+            except queue.Full:
+                # Slow consumer: drop its oldest event rather than block the game
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait((event, data))
+
+
+# Channel storage, keyed like game_sessions
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def subscribe(game_id):
+    """Subscribe to a game's channel, creating it on first use; returns (channel, queue)"""
+    # Under the same lock as the cleanup in event_stream, so a channel can't be
+    # dropped between looking it up and subscribing to it
+    with _channels_lock:
+        channel = _channels.get(game_id)
+        if channel is None:
+            channel = _channels[game_id] = GameChannel()
+        return channel, channel.subscribe()
+
+
+def has_subscribers(game_id):
+    channel = _channels.get(game_id)
+    return channel is not None and channel.has_subscribers()
+
+
+def publish(game_id, event, data):
+    """Publish an event to a game's subscribers, if it has any"""
+    channel = _channels.get(game_id)
+    if channel is not None:
+        channel.publish(event, data)
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def event_stream(game_id):
+    """Yield SSE messages for a game until the client disconnects"""
+    channel, q = subscribe(game_id)
+    try:
+        # Tell the client the stream is live so it can stop expecting inline AI moves
+        yield format_sse("ready", {"gameId": game_id})
+        while True:
+            try:
+                event, data = q.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event, data)
+    finally:
+        channel.unsubscribe(q)
+        with _channels_lock:
+            if not channel.has_subscribers() and _channels.get(game_id) is channel:
+                del _channels[game_id]
@@ -0,0 +1,51 @@
+import os
+
+# Settings shared by the server and the offline tools. Importing this module
+# has no side effects, unlike importing app, which starts the AI worker pool
+# and the server's background threads.
+
+# Scoring weights for the AI strategies, tuned by self-play with tools.tune;
+# the built-in defaults are used when the file is missing
+WEIGHTS_FILE = os.environ.get("BATTLESHIP_WEIGHTS_FILE", os.path.join("data", "ai_weights.json"))
+
+# Append-only log of every game's events, read back by tools.replay; set
+# BATTLESHIP_EVENT_LOG="" to disable
+EVENT_LOG_DIR = os.environ.get("BATTLESHIP_EVENT_LOG", os.path.join("data", "events"))
+
+# Read-only AI tables built by tools.build_tables and memory-mapped by every
+# server worker; without the file each process builds its own
+TABLES_FILE = os.environ.get("BATTLESHIP_TABLES_FILE", os.path.join("data", "tables.bin"))
+
+# Key signing the session cookie that holds a player's game id. It has to
+# outlive restarts (or games restored after one could not be found) and be
+# the same in every server worker: set BATTLESHIP_SECRET_KEY, or one is
+# generated into SECRET_KEY_FILE on first use.
+SECRET_KEY_FILE = os.environ.get("BATTLESHIP_SECRET_KEY_FILE", os.path.join("data", "secret_key"))
+
+
+def secret_key():
+    """The session signing key, creating SECRET_KEY_FILE if there is none yet"""
+    key = os.environ.get("BATTLESHIP_SECRET_KEY")
+    if key:
+        return key.encode()
+    try:
+        with open(SECRET_KEY_FILE, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    # Written aside and linked into place, so workers starting together all
+    # end up with whichever key got there first, and never a partial one
+    os.makedirs(os.path.dirname(SECRET_KEY_FILE) or ".", exist_ok=True)
+    tmp = f"{SECRET_KEY_FILE}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(os.urandom(32))
+    try:
+        os.link(tmp, SECRET_KEY_FILE)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp)
+    with open(SECRET_KEY_FILE, "rb") as f:
+        return f.read()
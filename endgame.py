@@ -0,0 +1,110 @@
+import numpy as np
+
+# Exact play starts once the product of the remaining ships' candidate
+# placement counts, an upper bound on the fleet arrangements left, is at most
+# SPACE_LIMIT; a solve gives up (and the heuristics play the turn) after
+# examining NODE_LIMIT placements, so its cost stays bounded either way
+SPACE_LIMIT = 20_000
+NODE_LIMIT = 100_000
+
+
+class SearchTooLarge(Exception):
+    pass
+
+
+def candidates(index, length, blocked, hits):
+    """Ids of the placements of a ship that cross no blocked cell and aren't all hits.
+
+    A ship whose every cell has been hit would have sunk, so a remaining
+    ship can't lie entirely on hits.
+    """
+    masks = index.masks[length]
+    return [pid for pid, mask in enumerate(masks) if not mask & blocked and mask & ~hits]
+
+
+def solve(index, remaining, blocked, hits, targets, space_limit=SPACE_LIMIT, node_limit=NODE_LIMIT):
+    """Exact chance that each cell holds one of the remaining ships, or None if the search is too large.
+
+    Enumerates every arrangement of the remaining ship lengths that doesn't
+    overlap, crosses no blocked cell (water and sunk ships), covers every
+    cell of targets (hits on ships not yet sunk, and ships found by sonar)
+    and puts no ship entirely on hits, all arrangements equally likely.
+    Ships are placed longest first by bitset backtracking; equal lengths
+    are placed in increasing placement order so each arrangement is found
+    once, branches that leave a target no remaining ship can reach are cut,
+    and subtrees are memoized on the cells they can still use.
+
+    Returns (probabilities, arrangements), probabilities an array over cells.
+    """
+    lengths = sorted(remaining, reverse=True)
+    options = {length: candidates(index, length, blocked, hits) for length in set(lengths)}
+    space = 1
+    for length in lengths:
+        space *= len(options[length])
+        if space > space_limit:
+            return None
+    if space == 0:
+        return None
+
+    masks = [[index.masks[length][pid] for pid in options[length]] for length in lengths]
+    rows = [[index.rows[length].start + pid for pid in options[length]] for length in lengths]
+    matrix = index.matrix
+    cells = matrix.shape[1]
+    ships = len(lengths)
+
+    # reach[k]: cells the ships from k on could cover; spare[k]: how many cells they fill
+    reach = [0] * (ships + 1)
+    spare = [0] * (ships + 1)
+    for k in range(ships - 1, -1, -1):
+        for mask in masks[k]:
+            reach[k] |= mask
+        reach[k] |= reach[k + 1]
+        spare[k] = spare[k + 1] + lengths[k]
+
+    memo = {}
+    nodes = 0
+
+    def search(k, occupied, start):
+        """(arrangements, per-cell cover counts) of ships k on, given the occupied cells"""
+        nonlocal nodes
+        key = (k, occupied & reach[k], start)
+        if key in memo:
+            return memo[key]
+        nodes += len(masks[k]) - start
+        if nodes > node_limit:
+            raise SearchTooLarge()
+
+        uncovered = targets & ~occupied
+        same = k + 1 < ships and lengths[k + 1] == lengths[k]
+        total = 0
+        cover = np.zeros(cells)
+        if k == ships - 1:
+            fits = [rows[k][j] for j in range(start, len(masks[k]))
+                    if not masks[k][j] & occupied and masks[k][j] & uncovered == uncovered]
+            total = len(fits)
+            if fits:
+                cover = matrix[fits].sum(axis=0)
+        else:
+            for j in range(start, len(masks[k])):
+                mask = masks[k][j]
+                if mask & occupied:
+                    continue
+                left = uncovered & ~mask
+                if left & ~reach[k + 1] or left.bit_count() > spare[k + 1]:
+                    continue
+                count, below = search(k + 1, occupied | mask, j + 1 if same else 0)
+                if count:
+                    total += count
+                    cover += below + count * matrix[rows[k][j]]
+
+        memo[key] = (total, cover)
+        return memo[key]
+
+    try:
+        total, cover = search(0, 0, 0)
+    except SearchTooLarge:
+        return None
+    if not total:
+        return None
+    return cover / total, total
+
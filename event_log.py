@@ -0,0 +1,219 @@
+import atexit
+import os
+import struct
+import threading
+import time
+import uuid
+
+# Event types
+NEW_GAME = 1     # payload: seed (u64) + difficulty (utf-8), then NUL + strategy if it differs
+PLACEMENT = 2    # payload: side, then (row, col, direction) per ship
+SHOT = 3         # payload: row, col
+AIR_STRIKE = 4   # payload: target type (0=row, 1=column), index
+AI_SHOT = 5      # payload: row, col
+SINK = 6         # payload: side, ship index
+RESULT = 7       # payload: winner side
+POWERUP = 8      # payload: side, power-up index, row, col, direction (0=H, 1=V)
+
+EVENT_NAMES = {
+    NEW_GAME: "new_game", PLACEMENT: "placement", SHOT: "shot", AIR_STRIKE: "air_strike",
+    AI_SHOT: "ai_shot", SINK: "sink", RESULT: "result", POWERUP: "powerup"
+}
+
+# Event types that are moves, i.e. that advance the turn counter during replay
+MOVE_EVENTS = (SHOT, AIR_STRIKE, AI_SHOT, POWERUP)
+
+# Sides, as stored in PLACEMENT, SINK, RESULT and POWERUP payloads
+PLAYER = 0
+AI = 1
+
+# Record header: game id (uuid bytes), per-game sequence number, event type, payload length
+HEADER = struct.Struct("<16sIBH")
+SEED = struct.Struct("<Q")
+
+# Longest difficulty or strategy name a NEW_GAME payload holds, in bytes
+MAX_NAME = 64
+
+SEGMENT_SUFFIX = ".seg"
+
+
+class EventLog:
+    """Append-only log of game events, written in batches to segment files.
+
+    append() only copies the record into an in-memory buffer; a background
+    thread writes the buffer out every flush_interval seconds, or sooner once
+    batch_bytes have accumulated. Each process writes its own segments, which
+    are rotated once they reach segment_bytes.
+    """
+
+    def __init__(self, directory, flush_interval=0.05, batch_bytes=64 * 1024,
+                 segment_bytes=16 * 1024 * 1024):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.batch_bytes = batch_bytes
+        self.segment_bytes = segment_bytes
+
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+        # Segment names sort by process start time, then pid, then sequence
+        self._prefix = f"events-{int(time.time() * 1000):013d}-{os.getpid()}"
+        self._segment_seq = 0
+        self._segment = None
+        self._segment_size = 0
+
+        self._writer = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def append(self, game_id, seq, event_type, payload=b""):
+        """Queue one event; never touches the disk on the caller's thread"""
+        record = HEADER.pack(uuid.UUID(game_id).bytes, seq, event_type, len(payload)) + payload
+        with self._cond:
+            self._buffer += record
+            if len(self._buffer) >= self.batch_bytes:
+                self._cond.notify()
+
+    def flush(self):
+        """Write out everything appended so far"""
+        # Take the write lock first so concurrent flushes keep batches in order,
+        # but hold the buffer lock only for the swap so append() never waits on disk
+        with self._write_lock:
+            with self._cond:
+                data = self._buffer
+                self._buffer = bytearray()
+            if data:
+                self._write(data)
+
+    def checkpoint(self):
+        """Flush, then return (segment name, offset) of the end of the log so far"""
+        self.flush()
+        with self._write_lock:
+            if self._segment is None:
+                return None
+            return os.path.basename(self._segment.name), self._segment.tell()
+
+    @property
+    def prefix(self):
+        """Name prefix shared by all of this writer's segments"""
+        return self._prefix
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+        self.flush()
+        with self._write_lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.batch_bytes:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def _write(self, data):
+        if self._segment is None or self._segment_size >= self.segment_bytes:
+            self._open_segment()
+        self._segment.write(data)
+        self._segment.flush()
+        self._segment_size += len(data)
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._segment_seq += 1
+        name = f"{self._prefix}-{self._segment_seq:06d}{SEGMENT_SUFFIX}"
+        self._segment = open(os.path.join(self.directory, name), "ab")
+        self._segment_size = 0
+
+
+def list_segments(directory):
+    """Segment file paths in write order"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def segment_prefix(path):
+    """Writer prefix of a segment file name"""
+    return os.path.basename(path).rsplit("-", 1)[0]
+
+
+def read_segment(path, offset=0):
+    """Yield (game_id, seq, event_type, payload, end offset) for each record in a segment.
+
+    A truncated record at the end of the file (from a crash mid-write) is ignored.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    pos = offset
+    size = HEADER.size
+    while pos + size <= len(data):
+        game_bytes, seq, event_type, length = HEADER.unpack_from(data, pos)
+        end = pos + size + length
+        if end > len(data):
+            break
+        yield str(uuid.UUID(bytes=game_bytes)), seq, event_type, data[pos + size:end], end
+        pos = end
+
+
+def iter_events(directory):
+    """Yield (game_id, event_type, payload) for every logged event"""
+    for path in list_segments(directory):
+        for game_id, _, event_type, payload, _ in read_segment(path):
+            yield game_id, event_type, payload
+
+
+def events_by_game(directory):
+    """Group all logged events by game id, preserving order"""
+    games = {}
+    for game_id, event_type, payload in iter_events(directory):
+        games.setdefault(game_id, []).append((event_type, payload))
+    return games
+
+
+def encode_new_game(seed, difficulty, strategy=None):
+    names = [difficulty] if strategy is None or strategy == difficulty else [difficulty, strategy]
+    encoded = [name.encode("utf-8") for name in names]
+    for name in encoded:
+        # A NUL would split the payload on replay; callers check names against strategies.STRATEGIES
+        if b"\0" in name or len(name) > MAX_NAME:
+            raise ValueError(f"Invalid difficulty or strategy name for the event log: {name[:MAX_NAME]!r}")
+    return SEED.pack(seed) + b"\0".join(encoded)
+
+
+def decode_new_game(payload):
+    """(seed, difficulty, strategy); strategy is None when it was the difficulty's own"""
+    difficulty, _, strategy = payload[SEED.size:].decode("utf-8").partition("\0")
+    return SEED.unpack_from(payload)[0], difficulty, strategy or None
+
+
+def encode_placement(side, layout):
+    """layout: [(row, col, "H" or "V"), ...] in fleet order"""
+    payload = bytearray([side])
+    for row, col, direction in layout:
+        payload += bytes([row, col, 0 if direction == "H" else 1])
+    return bytes(payload)
+
+
+def decode_placement(payload):
+    side = payload[0]
+    layout = [
+        (payload[i], payload[i + 1], "H" if payload[i + 2] == 0 else "V")
+        for i in range(1, len(payload), 3)
+    ]
+    return side, layout
@@ -0,0 +1,93 @@
+from functools import lru_cache
+
+import numpy as np
+
+import tables
+from board import SHIP_SIZES
+from placements import placement_index
+
+# Fleet placement policies for the AI: (size, rng) -> [(row, col, direction), ...]
+# in SHIP_SIZES order, or None to fall back to uniform random placement.
+
+# Candidate fleets sampled per game, and the share of the lowest-scoring valid
+# ones the fleet is drawn from; drawing at random among many good fleets
+# keeps the AI from settling into a layout players could learn
+SAMPLES = 4096
+KEEP = 0.05
+
+# Multiplier the hard AI puts on edge cells (strategies.WEIGHTS["edge"]); the
+# edge-averse hunter below models it without importing the strategies
+EDGE_AVERSION = 0.8
+
+
+@lru_cache(maxsize=None)
+def hunter_heat(size, lengths=tuple(SHIP_SIZES)):
+    """Per-cell opening heat of common hunters, one row each, scaled to mean 1.
+
+    The density hunter fires where the most placements of the fleet overlap
+    (the density stages' opening map); the edge-averse hunter is the same
+    but, like the hard AI, puts edge cells last.
+    """
+    index = placement_index(size, tuple(sorted(set(lengths))))
+    weights = np.zeros(len(index.matrix))
+    for length in lengths:
+        weights[index.rows[length]] += 1
+    density = weights @ index.matrix
+
+    r, c = np.divmod(np.arange(size * size), size)
+    edge = (r == 0) | (r == size - 1) | (c == 0) | (c == size - 1)
+    heat = np.array([density, density * np.where(edge, EDGE_AVERSION, 1)])
+    return heat / heat.mean(axis=1, keepdims=True)
+
+
+@lru_cache(maxsize=None)
+def placement_table(size, lengths=tuple(SHIP_SIZES)):
+    """For every placement in the shared index: its cell mask as 64-bit words, hunter score and layout entry"""
+    index = placement_index(size, tuple(sorted(set(lengths))))
+    layouts = [None] * len(index.matrix)
+    for length in set(lengths):
+        for pid, cells in enumerate(index.cells[length], index.rows[length].start):
+            direction = "H" if cells[1] - cells[0] == 1 else "V"
+            layouts[pid] = (*divmod(cells[0], size), direction)
+
+    def build_masks():
+        words = (size * size + 63) // 64
+        masks = np.zeros((len(index.matrix), words), dtype=np.uint64)
+        for length in set(lengths):
+            for pid, mask in enumerate(index.masks[length], index.rows[length].start):
+                for w in range(words):
+                    masks[pid, w] = (mask >> (64 * w)) & 0xFFFFFFFFFFFFFFFF
+        return masks
+
+    key = f"{size}:{','.join(map(str, lengths))}"
+    masks = tables.shared(f"fleet_masks:{key}", build_masks)
+    # How exposed a placement is: the worse of the hunters' heat over its cells
+    scores = tables.shared(f"fleet_scores:{key}", lambda: index.matrix @ hunter_heat(size, lengths).T)
+    return index, masks, scores, layouts
+
+
+def anti_density(size, rng, lengths=tuple(SHIP_SIZES), samples=SAMPLES, keep=KEEP):
+    """A fleet the common hunters are slow to find, drawn from the best of many random fleets.
+
+    Samples candidate fleets with one uniformly random placement per ship,
+    drops those with overlapping ships, and scores the rest by the heat the
+    hunters put on their cells (the worse hunter counts). The fleet is drawn
+    at random from the lowest-scoring `keep` share.
+    """
+    index, masks, scores, layouts = placement_table(size, lengths)
+    generator = np.random.default_rng(rng.getrandbits(64))
+    ids = np.stack([
+        generator.integers(index.rows[length].start, index.rows[length].stop, samples) for length in lengths
+    ], axis=1)
+
+    valid = np.ones(samples, dtype=bool)
+    for a in range(len(lengths)):
+        for b in range(a + 1, len(lengths)):
+            valid &= ~np.any(masks[ids[:, a]] & masks[ids[:, b]], axis=1)
+    ids = ids[valid]
+    if not len(ids):
+        return None
+
+    fleet_scores = scores[ids].sum(axis=1).max(axis=1)
+    best = np.argsort(fleet_scores, kind="stable")[:max(1, int(len(ids) * keep))]
+    return [layouts[pid] for pid in ids[best[generator.integers(len(best))]].tolist()]
@@ -0,0 +1,653 @@
+import random
+
+import admission
+import event_log
+import powerups
+import strategies
+from board import (GRID_SIZE, HIT, MISS, SHIP_CHARS, SHIP_NAMES, SHIP_SIZES, TOTAL_SHIP_PARTS, UNSHOT,
+                   cell_log, fire, ship_cells)
+
+# How cells are presented to the frontend (fleet value -> char, shot value -> bool)
+FLEET_VALUES = [None] + SHIP_CHARS
+SHOT_VALUES = [None, False, True]
+
+SNAPSHOT_VERSION = 6
+
+
+class BattleshipGame:
+    # Thousands of games live in one worker, so instances carry no __dict__ and
+    # keep their boards in flat byte arrays. Scratch state for the AI lives in
+    # a strategies.TurnContext that only exists while it is choosing.
+    __slots__ = (
+        "game_id", "player_id", "recorder", "prior", "seq", "snapshot_seq", "seed", "size", "difficulty", "strategy",
+        "player_fleet", "ai_fleet", "player_shots", "ai_shots", "player_layout",
+        "player_fleet_damage", "ai_fleet_damage",
+        "player_hits", "ai_hits", "game_over", "winner", "current_turn",
+        "player_powerups", "ai_powerups", "player_revealed", "ai_known_water", "ai_known_ships",
+        "ai_hits_queue", "ai_orientation", "ai_last_hit", "ai_hunt_mode", "ai_open_hits",
+        "player_moves", "ai_moves",
+    )
+
+    def __init__(self, difficulty="medium", game_id=None, seed=None, recorder=None, size=GRID_SIZE,
+                 player_id=None, prior=None, strategy=None, _place_ai=True):
+        # Identity and event recording (recorder is an EventLog, or None when not recording)
+        self.game_id = game_id
+        self.player_id = player_id
+        self.recorder = recorder
+        self.prior = prior  # PlacementPrior shared by all games, or None
+        self.seq = 0  # Number of events this game has produced
+        self.snapshot_seq = None  # seq covered by the last saved snapshot
+
+        # All randomness derives from the seed so games can be reproduced
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.size = size
+
+        # Fleets (0=water, ship index + 1=ship part) and shots (UNSHOT, MISS or HIT)
+        cells = size * size
+        self.player_fleet = bytearray(cells)
+        self.ai_fleet = bytearray(cells)
+        self.player_shots = bytearray(cells)  # The player's shots at the AI fleet
+        self.ai_shots = bytearray(cells)  # The AI's shots at the player fleet
+        self.player_layout = None  # Encoded PLACEMENT payload of the player's fleet
+
+        # Hits taken by each ship, so sinking is a counter check instead of a board scan
+        self.player_fleet_damage = bytearray(len(SHIP_SIZES))
+        self.ai_fleet_damage = bytearray(len(SHIP_SIZES))
+
+        # Game state
+        self.player_hits = 0
+        self.ai_hits = 0
+        self.game_over = False
+        self.winner = None
+        self.current_turn = "player"  # player or ai
+        self.difficulty = difficulty.lower()
+
+        # AI targeting pipeline (see strategies.py); defaults to the one named after the difficulty
+        if strategy is None:
+            strategy = self.difficulty if self.difficulty in strategies.STRATEGIES else strategies.DEFAULT_STRATEGY
+        self.strategy = strategy
+
+        # Power-ups (see powerups.py): charges and cooldowns per side, and what sonar has revealed
+        self.player_powerups = powerups.initial_state()
+        self.ai_powerups = powerups.initial_state()
+        self.player_revealed = 0  # Bitmask of AI fleet cells the player has scanned
+        self.ai_known_water = 0  # Bitmasks of player fleet cells the AI has scanned, by what it found
+        self.ai_known_ships = 0
+
+        # AI state (cells are flat indices; ai_last_hit is -1 when there is none)
+        self.ai_hits_queue = cell_log(size)
+        self.ai_orientation = None
+        self.ai_last_hit = -1
+        self.ai_hunt_mode = True
+        self.ai_open_hits = 0  # Bitmask of hits on ships not yet sunk
+
+        # Track player and AI moves as flat cell indices
+        self.player_moves = cell_log(size)
+        self.ai_moves = cell_log(size)
+
+        # Place AI ships, unless from_events/from_snapshot is about to overwrite
+        # the board (the hard AIs' fleet policy costs milliseconds)
+        ai_layout = self.place_ai_ships(self.ai_fleet) if _place_ai else []
+
+        self.record(event_log.NEW_GAME, event_log.encode_new_game(self.seed, self.difficulty, self.strategy))
+        self.record(event_log.PLACEMENT, event_log.encode_placement(event_log.AI, ai_layout))
+
+    @property
+    def air_strike_available(self):
+        return powerups.ready(self.player_powerups, powerups.get("air_strike"))
+
+    @property
+    def remaining_player_ships(self):
+        """Sizes of the player's ships still afloat"""
+        return [size for size, damage in zip(SHIP_SIZES, self.player_fleet_damage) if damage < size]
+
+    @property
+    def remaining_ai_ships(self):
+        """Sizes of the AI's ships still afloat"""
+        return [size for size, damage in zip(SHIP_SIZES, self.ai_fleet_damage) if damage < size]
+
+    @property
+    def turn_seed(self):
+        """Seed of the current turn's random generator, derived from the game seed and event count"""
+        return self.seed * 1000003 + self.seq
+
+    def new_rng(self):
+        """Random generator for the current turn"""
+        return random.Random(self.turn_seed)
+
+    def record(self, event_type, payload=b""):
+        """Append an event to this game's log, if it is being recorded"""
+        # seq also advances when not recording, so replays reproduce it exactly
+        if self.recorder is not None:
+            self.recorder.append(self.game_id, self.seq, event_type, payload)
+        self.seq += 1
+
+    def ship_cells(self, direction, row, col, length):
+        """Flat cell indices covered by a ship, or None if it leaves the board"""
+        n = self.size
+        if not (0 <= row < n and 0 <= col < n):
+            return None
+        if direction == "H":
+            if col + length > n:
+                return None
+            return range(row * n + col, row * n + col + length)
+        if row + length > n:
+            return None
+        return range(row * n + col, (row + length) * n + col, n)
+
+    def place_ships_random(self, fleet):
+        """Place ships randomly on the given fleet array, returning [(row, col, direction), ...]"""
+        rng = self.new_rng()
+        layout = []
+        for ship, size in enumerate(SHIP_SIZES):
+            while True:
+                d = rng.choice(["H", "V"])
+                r, c = rng.randint(0, self.size - 1), rng.randint(0, self.size - 1)
+                cells = self.ship_cells(d, r, c, size)
+                if cells is not None and all(fleet[i] == 0 for i in cells):
+                    for i in cells:
+                        fleet[i] = ship + 1
+                    break
+            layout.append((r, c, d))
+        return layout
+
+    def place_ai_ships(self, fleet):
+        """Place the AI's fleet with its strategy's fleet policy, or at random without one"""
+        policy = strategies.get(self.strategy).fleet_policy
+        layout = policy(self.size, self.new_rng()) if policy is not None else None
+        if layout is None:
+            return self.place_ships_random(fleet)
+        for ship, (r, c, d) in enumerate(layout):
+            for i in self.ship_cells(d, r, c, SHIP_SIZES[ship]):
+                fleet[i] = ship + 1
+        return layout
+
+    def validate_player_ship_placement(self, ships):
+        """Validate player ship placements from frontend"""
+        # Clear player fleet
+        fleet = self.player_fleet = bytearray(self.size * self.size)
+
+        # Check if all ships are placed
+        if len(ships) != len(SHIP_SIZES):
+            return False
+
+        # Place each ship on the grid
+        for i, ship in enumerate(ships):
+            cells = self.ship_cells(ship['direction'], ship['row'], ship['col'], SHIP_SIZES[i])
+            if cells is None:
+                return False
+            for cell in cells:
+                if fleet[cell]:
+                    return False
+                fleet[cell] = i + 1
+
+        layout = [(ship['row'], ship['col'], ship['direction']) for ship in ships]
+        self.player_layout = event_log.encode_placement(event_log.PLAYER, layout)
+        self.record(event_log.PLACEMENT, self.player_layout)
+        return True
+
+    def ship_cell_dicts(self, fleet, cell):
+        """Cells of the ship covering cell in the frontend's {"row", "col"} form"""
+        n = self.size
+        return [{"row": i // n, "col": i % n} for i in ship_cells(fleet, n, cell)]
+
+    def player_shoot(self, row, col):
+        """Process player's shot"""
+        # Check if it's player's turn and coordinates are valid
+        if self.current_turn != "player" or self.game_over:
+            return {"status": "error", "message": "Not your turn or game over"}
+
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            return {"status": "error", "message": "Invalid row or column"}
+
+        # Check if this cell was already shot
+        cell = row * self.size + col
+        if self.player_shots[cell] != UNSHOT:
+            return {"status": "error", "message": "You already shot here"}
+
+        # Record and resolve player move
+        self.record(event_log.SHOT, bytes([row, col]))
+        powerups.tick(self.player_powerups)
+        _, hits, sunk = self.fire_volley((cell,))
+
+        result = {"status": "success", "hit": bool(hits), "row": row, "col": col}
+        if sunk:
+            result["shipSunk"] = True
+            result["shipName"] = SHIP_NAMES[self.ai_fleet[cell] - 1]
+            result["shipCells"] = self.ship_cell_dicts(self.ai_fleet, cell)
+
+        # Check if game is over
+        if self.player_hits == TOTAL_SHIP_PARTS:
+            self.end_game("player")
+            result["gameOver"] = True
+            result["winner"] = "player"
+            return result
+
+        # Switch turn
+        self.current_turn = "ai"
+        return result
+
+    def end_game(self, winner):
+        """Finish the game and teach the placement prior where the player put their fleet"""
+        self.game_over = True
+        self.winner = winner
+        self.record(event_log.RESULT, bytes([event_log.PLAYER if winner == "player" else event_log.AI]))
+        if self.prior is not None and self.player_layout is not None:
+            self.prior.learn_placement(self.player_id, self.player_layout, SHIP_SIZES)
+
+    def ai_shoot(self):
+        """AI makes a shot, or uses a power-up when its strategy calls for one"""
+        if self.current_turn != "ai" or self.game_over:
+            return {"status": "error", "message": "Not AI's turn or game over"}
+
+        # The strategy runs inline, or in the AI worker pool when it is CPU-heavy,
+        # once the admission scheduler gives it a compute slot
+        action = admission.decide(self)
+        if action is None:
+            return {"status": "error", "message": "AI couldn't find a valid target"}
+        if action[0] == "powerup":
+            return self.ai_use_powerup(*action[1:])
+        return self.resolve_ai_shot(*divmod(action[1], self.size))
+
+    def resolve_ai_shot(self, row, col):
+        """Apply the AI's shot at a chosen cell"""
+        cell = row * self.size + col
+
+        # Record AI move
+        self.ai_moves.append(cell)
+        self.record(event_log.AI_SHOT, bytes([row, col]))
+        powerups.tick(self.ai_powerups)
+
+        # Perform attack
+        ship = self.player_fleet[cell] - 1
+        hit = ship >= 0
+        self.ai_shots[cell] = HIT if hit else MISS
+
+        result = {"status": "success", "hit": hit, "row": row, "col": col}
+
+        if hit:
+            # Hit a ship
+            self.ai_hits += 1
+            self.player_fleet_damage[ship] += 1
+            self.ai_hunt_mode = False
+
+            # Update AI targeting information
+            self.ai_last_hit = cell
+            self.ai_hits_queue.append(cell)
+            self.ai_open_hits |= 1 << cell
+
+            # Try to determine ship orientation
+            if len(self.ai_hits_queue) >= 2 and not self.ai_orientation:
+                self.ai_orientation = self.find_orientation()
+
+            # Check if the ship is sunk
+            if self.player_fleet_damage[ship] == SHIP_SIZES[ship]:
+                result["shipSunk"] = True
+                result["shipName"] = SHIP_NAMES[ship]
+                result["shipCells"] = self.ship_cell_dicts(self.player_fleet, cell)
+                self.record(event_log.SINK, bytes([event_log.PLAYER, ship]))
+
+                # Reset targeting information after sinking a ship; hits on
+                # other ships stay open
+                for i in ship_cells(self.player_fleet, self.size, cell):
+                    self.ai_open_hits &= ~(1 << i)
+                del self.ai_hits_queue[:]
+                self.ai_orientation = None
+                self.ai_hunt_mode = True
+
+        # Check if game is over
+        if self.ai_hits == TOTAL_SHIP_PARTS:
+            self.end_game("ai")
+            result["gameOver"] = True
+            result["winner"] = "ai"
+            return result
+
+        # Switch turn
+        self.current_turn = "player"
+        return result
+
+    def find_orientation(self):
+        """Find orientation of a ship based on hits"""
+        if len(self.ai_hits_queue) < 2:
+            return None
+
+        # Check the last two hits
+        n = self.size
+        first, second = self.ai_hits_queue[-2], self.ai_hits_queue[-1]
+
+        if first // n == second // n:  # Same row means horizontal
+            return "H"
+        elif first % n == second % n:  # Same column means vertical
+            return "V"
+
+        return None
+
+    def is_ship_sunk(self, fleet, cell):
+        """Check if the ship occupying a cell of a fleet is completely sunk"""
+        ship = fleet[cell] - 1
+        if ship < 0:
+            return False
+        damage = self.player_fleet_damage if fleet is self.player_fleet else self.ai_fleet_damage
+        return damage[ship] == SHIP_SIZES[ship]
+
+    def fire_volley(self, cells, stop_at_hit=False):
+        """Apply the player's shots at every unshot cell of cells at once (see board.fire).
+
+        Shared by the area weapons: records the moves and any sinks, and
+        returns (cells fired at, cells hit, cells whose hit sank a ship).
+        """
+        fired, hits, sunk = fire(self.player_shots, self.ai_fleet, self.ai_fleet_damage, cells, stop_at_hit)
+        self.player_moves.extend(fired)
+        self.player_hits += len(hits)
+        for i in sunk:
+            self.record(event_log.SINK, bytes([event_log.AI, self.ai_fleet[i] - 1]))
+        return fired, hits, sunk
+
+    def ai_volley(self, cells, stop_at_hit=False):
+        """fire_volley for the AI's shots at the player fleet, keeping its targeting state in step"""
+        fired, hits, sunk = fire(self.ai_shots, self.player_fleet, self.player_fleet_damage, cells, stop_at_hit)
+        self.ai_moves.extend(fired)
+        self.ai_hits += len(hits)
+        for i in hits:
+            self.ai_open_hits |= 1 << i
+        for i in sunk:
+            self.record(event_log.SINK, bytes([event_log.PLAYER, self.player_fleet[i] - 1]))
+            for j in ship_cells(self.player_fleet, self.size, i):
+                self.ai_open_hits &= ~(1 << j)
+
+        if hits:
+            # Target from the hits this volley left open, or go back to hunting
+            still_open = [i for i in hits if self.ai_open_hits >> i & 1]
+            del self.ai_hits_queue[:]
+            self.ai_hits_queue.extend(still_open)
+            self.ai_orientation = self.find_orientation()
+            if still_open:
+                self.ai_last_hit = still_open[-1]
+            self.ai_hunt_mode = not still_open
+        return fired, hits, sunk
+
+    def use_powerup(self, side, powerup, row, col, direction):
+        """Resolve a power-up for either side; callers validate and record it first.
+
+        Shots go through fire_volley/ai_volley. Reveals only mark what the
+        scan found: the player's on player_revealed, the AI's on its known
+        water and known ship bitmasks, which its strategy stages read.
+        """
+        state = self.player_powerups if side == event_log.PLAYER else self.ai_powerups
+        powerups.tick(state)
+        powerups.spend(state, powerup)
+
+        n = self.size
+        cells = powerup.cells(n, row, col, direction)
+        result = {"status": "success", "powerUp": powerup.name, "row": row, "col": col, "direction": direction}
+
+        if powerup.kind == powerups.REVEAL:
+            fleet = self.ai_fleet if side == event_log.PLAYER else self.player_fleet
+            scanned = 0
+            ships = 0
+            for i in cells:
+                scanned |= 1 << i
+                if fleet[i]:
+                    ships |= 1 << i
+            if side == event_log.PLAYER:
+                self.player_revealed |= scanned
+            else:
+                self.ai_known_ships |= ships
+                self.ai_known_water |= scanned & ~ships
+            result["revealed"] = [{"row": i // n, "col": i % n, "ship": bool(fleet[i])} for i in cells]
+            hits = sunk = ()
+            fired = []
+        elif side == event_log.PLAYER:
+            fired, hits, sunk = self.fire_volley(cells, powerup.stop_at_hit)
+        else:
+            fired, hits, sunk = self.ai_volley(cells, powerup.stop_at_hit)
+
+        shots, fleet = (self.player_shots, self.ai_fleet) if side == event_log.PLAYER else (self.ai_shots, self.player_fleet)
+        result["results"] = [{"row": i // n, "col": i % n, "hit": shots[i] == HIT} for i in fired]
+        result["hit"] = bool(hits)
+        result["hitCount"] = len(hits)
+        result["sunkShips"] = [
+            {"shipName": SHIP_NAMES[fleet[i] - 1], "shipCells": self.ship_cell_dicts(fleet, i)} for i in sunk
+        ]
+        return result
+
+    def player_use_powerup(self, name, row, col, direction="H"):
+        """Process the player's use of a power-up aimed at (row, col)"""
+        if self.current_turn != "player" or self.game_over:
+            return {"status": "error", "message": "Not your turn or game over"}
+
+        powerup = powerups.get(name)
+        if powerup is None:
+            return {"status": "error", "message": f"Unknown power-up: {name}"}
+        if not (0 <= row < self.size and 0 <= col < self.size) or direction not in powerups.DIRECTIONS:
+            return {"status": "error", "message": "Invalid target"}
+        if not powerups.ready(self.player_powerups, powerup):
+            return {"status": "error", "message": f"{name} is not ready"}
+
+        self.record(event_log.POWERUP, bytes([event_log.PLAYER, powerup.index, row, col, direction == "V"]))
+        result = self.use_powerup(event_log.PLAYER, powerup, row, col, direction)
+        result["powerUps"] = powerups.describe(self.player_powerups)
+
+        # Check if game is over
+        if self.player_hits == TOTAL_SHIP_PARTS:
+            self.end_game("player")
+            result["gameOver"] = True
+            result["winner"] = "player"
+            return result
+
+        self.current_turn = "ai"
+        return result
+
+    def ai_use_powerup(self, name, row, col, direction="H"):
+        """Apply a power-up the AI chose (or, during replay, logged)"""
+        powerup = powerups.get(name)
+        self.record(event_log.POWERUP, bytes([event_log.AI, powerup.index, row, col, direction == "V"]))
+        result = self.use_powerup(event_log.AI, powerup, row, col, direction)
+
+        if self.ai_hits == TOTAL_SHIP_PARTS:
+            self.end_game("ai")
+            result["gameOver"] = True
+            result["winner"] = "ai"
+            return result
+
+        self.current_turn = "player"
+        return result
+
+    def player_air_strike(self, target_type, target_index):
+        """Process player's air strike (attack whole row or column)"""
+        # Check if it's player's turn and air strike is available
+        if self.current_turn != "player" or self.game_over or not self.air_strike_available:
+            return {"status": "error", "message": "Can't use air strike now"}
+
+        # Validate input
+        n = self.size
+        if target_type not in ["row", "column"] or not (0 <= target_index < n):
+            return {"status": "error", "message": "Invalid target"}
+
+        # Use the air strike
+        self.record(event_log.AIR_STRIKE, bytes([0 if target_type == "row" else 1, target_index]))
+        if target_type == "row":
+            result = self.use_powerup(event_log.PLAYER, powerups.get("air_strike"), target_index, 0, "H")
+        else:  # column
+            result = self.use_powerup(event_log.PLAYER, powerups.get("air_strike"), 0, target_index, "V")
+
+        response = {
+            "status": "success",
+            "targetType": target_type,
+            "targetIndex": target_index,
+            "results": result["results"],
+            "hitCount": result["hitCount"],
+            "sunkShips": result["sunkShips"],
+            "airStrikeAvailable": self.air_strike_available
+        }
+
+        # Check if game is over
+        if self.player_hits >= TOTAL_SHIP_PARTS:
+            self.end_game("player")
+            response["gameOver"] = True
+            response["winner"] = "player"
+            return response
+
+        # Switch turn to AI
+        self.current_turn = "ai"
+        return response
+
+    def revealed(self, scanned, fleet):
+        """Board of scanned cells in shot values: HIT where a ship was found, MISS for water"""
+        board = bytearray(len(fleet))
+        if not scanned:
+            return board
+        for i in range(len(fleet)):
+            if scanned >> i & 1:
+                board[i] = HIT if fleet[i] else MISS
+        return board
+
+    def rows(self, cells, values):
+        """Expand a flat board into the nested lists the frontend expects"""
+        n = self.size
+        return [[values[v] for v in cells[r * n:(r + 1) * n]] for r in range(n)]
+
+    def get_game_state(self):
+        """Return the current game state for the frontend"""
+        return {
+            "playerGrid": self.rows(self.player_fleet, FLEET_VALUES),
+            "aiGrid": self.rows(self.ai_fleet, FLEET_VALUES),
+            "playerShots": self.rows(self.player_shots, SHOT_VALUES),
+            "aiShots": self.rows(self.ai_shots, SHOT_VALUES),
+            "playerHits": self.player_hits,
+            "aiHits": self.ai_hits,
+            "gameOver": self.game_over,
+            "winner": self.winner,
+            "currentTurn": self.current_turn,
+            "difficulty": self.difficulty,
+            "remainingPlayerShips": self.remaining_player_ships,
+            "remainingAiShips": self.remaining_ai_ships,
+            "airStrikeAvailable": self.air_strike_available,
+            "powerUps": powerups.describe(self.player_powerups),
+            "aiPowerUps": powerups.describe(self.ai_powerups),
+            "playerRevealed": self.rows(self.revealed(self.player_revealed, self.ai_fleet), SHOT_VALUES),
+            "aiRevealed": self.rows(self.revealed(self.ai_known_water | self.ai_known_ships, self.player_fleet),
+                                    SHOT_VALUES)
+        }
+
+    def apply_event(self, event_type, payload):
+        """Re-apply one logged event to this game (used by replay)"""
+        if event_type == event_log.PLACEMENT:
+            side, layout = event_log.decode_placement(payload)
+            ships = [{"row": r, "col": c, "direction": d} for r, c, d in layout]
+            if side == event_log.PLAYER:
+                self.validate_player_ship_placement(ships)
+            else:
+                fleet = self.ai_fleet = bytearray(self.size * self.size)
+                for i, ship in enumerate(ships):
+                    for cell in self.ship_cells(ship["direction"], ship["row"], ship["col"], SHIP_SIZES[i]):
+                        fleet[cell] = i + 1
+        elif event_type == event_log.SHOT:
+            self.player_shoot(payload[0], payload[1])
+        elif event_type == event_log.AIR_STRIKE:
+            self.player_air_strike("row" if payload[0] == 0 else "column", payload[1])
+        elif event_type == event_log.AI_SHOT:
+            self.resolve_ai_shot(payload[0], payload[1])
+        elif event_type == event_log.POWERUP:
+            side, index, row, col, vertical = payload
+            name = powerups.by_index(index).name
+            if side == event_log.PLAYER:
+                self.player_use_powerup(name, row, col, "V" if vertical else "H")
+            else:
+                self.ai_use_powerup(name, row, col, "V" if vertical else "H")
+        # NEW_GAME is consumed by from_events; SINK and RESULT follow from the moves
+
+    @classmethod
+    def from_events(cls, events, game_id=None, turn=None):
+        """Rebuild a game from its logged (event_type, payload) pairs.
+
+        If turn is given, stop after that many moves (shots, air strikes, power-ups and AI shots).
+        """
+        events = iter(events)
+        event_type, payload = next(events)
+        if event_type != event_log.NEW_GAME:
+            raise ValueError("Event log for game does not start with NEW_GAME")
+
+        seed, difficulty, strategy = event_log.decode_new_game(payload)
+        game = cls(difficulty, game_id=game_id, seed=seed, strategy=strategy, _place_ai=False)
+
+        moves = 0
+        for event_type, payload in events:
+            if event_type in event_log.MOVE_EVENTS:
+                if turn is not None and moves >= turn:
+                    break
+                moves += 1
+            game.apply_event(event_type, payload)
+        return game
+
+    def to_snapshot(self):
+        """Compact copy of the game state for crash recovery"""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "gameId": self.game_id,
+            "playerId": self.player_id,
+            "seed": self.seed,
+            "seq": self.seq,
+            "size": self.size,
+            "difficulty": self.difficulty,
+            "strategy": self.strategy,
+            "playerFleet": bytes(self.player_fleet),
+            "aiFleet": bytes(self.ai_fleet),
+            "playerShots": bytes(self.player_shots),
+            "aiShots": bytes(self.ai_shots),
+            "playerLayout": self.player_layout,
+            "playerFleetDamage": bytes(self.player_fleet_damage),
+            "aiFleetDamage": bytes(self.ai_fleet_damage),
+            "playerHits": self.player_hits,
+            "aiHits": self.ai_hits,
+            "gameOver": self.game_over,
+            "winner": self.winner,
+            "currentTurn": self.current_turn,
+            "playerPowerUps": bytes(self.player_powerups),
+            "aiPowerUps": bytes(self.ai_powerups),
+            "playerRevealed": self.player_revealed,
+            "aiKnownWater": self.ai_known_water,
+            "aiKnownShips": self.ai_known_ships,
+            "aiHitsQueue": self.ai_hits_queue[:],
+            "aiOrientation": self.ai_orientation,
+            "aiLastHit": self.ai_last_hit,
+            "aiHuntMode": self.ai_hunt_mode,
+            "aiOpenHits": self.ai_open_hits,
+            "playerMoves": self.player_moves[:],
+            "aiMoves": self.ai_moves[:]
+        }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        """Rebuild a game from to_snapshot() output"""
+        if data["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {data['version']}")
+
+        game = cls(data["difficulty"], game_id=data["gameId"], seed=data["seed"], size=data["size"],
+                   player_id=data["playerId"], strategy=data["strategy"], _place_ai=False)
+        game.seq = game.snapshot_seq = data["seq"]
+        game.player_fleet = bytearray(data["playerFleet"])
+        game.ai_fleet = bytearray(data["aiFleet"])
+        game.player_shots = bytearray(data["playerShots"])
+        game.ai_shots = bytearray(data["aiShots"])
+        game.player_layout = data["playerLayout"]
+        game.player_fleet_damage = bytearray(data["playerFleetDamage"])
+        game.ai_fleet_damage = bytearray(data["aiFleetDamage"])
+        game.player_hits = data["playerHits"]
+        game.ai_hits = data["aiHits"]
+        game.game_over = data["gameOver"]
+        game.winner = data["winner"]
+        game.current_turn = data["currentTurn"]
+        game.player_powerups = bytearray(data["playerPowerUps"])
+        game.ai_powerups = bytearray(data["aiPowerUps"])
+        game.player_revealed = data["playerRevealed"]
+        game.ai_known_water = data["aiKnownWater"]
+        game.ai_known_ships = data["aiKnownShips"]
+        game.ai_hits_queue.extend(data["aiHitsQueue"])
+        game.ai_orientation = data["aiOrientation"]
+        game.ai_last_hit = data["aiLastHit"]
+        game.ai_hunt_mode = data["aiHuntMode"]
+        game.ai_open_hits = data["aiOpenHits"]
+        game.player_moves.extend(data["playerMoves"])
+        game.ai_moves.extend(data["aiMoves"])
+        return game
@@ -0,0 +1,173 @@
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+import tables
+from board import HIT, MISS, UNSHOT
+
+# Cell codes of a lookahead state: the shot board, with hits on ships not yet
+# sunk told apart from hits on sunk ones
+OPEN_HIT = 3
+
+# Value of a hit in nats: entropy alone ignores that hits, not information,
+# win the game, and scoring both plays better than either
+HIT_VALUE = 1.0
+
+# Entries kept by the shared transposition table; each is a ~110 byte key and a float
+TABLE_SIZE = 50_000
+
+
+class TranspositionTable:
+    """Bounded map from canonical state keys to values, evicting the least recently used"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+TABLE = TranspositionTable(TABLE_SIZE)
+
+
+@lru_cache(maxsize=None)
+def symmetries(size):
+    """Cell permutations for the 8 rotations and reflections of a size x size board"""
+    def build():
+        grid = np.arange(size * size).reshape(size, size)
+        perms = []
+        for turns in range(4):
+            rotated = np.rot90(grid, turns)
+            perms.append(rotated.ravel())
+            perms.append(rotated.T.ravel())
+        return np.array(perms)
+
+    return tables.shared(f"symmetries:{size}", build)
+
+
+def canonical_key(state, lengths):
+    """Key shared by a state and all its rotations and reflections"""
+    return min(state[perm].tobytes() for perm in symmetries(int(len(state) ** 0.5))) + bytes(lengths)
+
+
+def state_of(shots, open_hits, known_water=0):
+    """Lookahead state for a shot board, open-hit bitmask and bitmask of cells known to be water"""
+    state = np.frombuffer(shots, dtype=np.uint8).copy()
+    for i in range(len(state)):
+        if open_hits >> i & 1:
+            state[i] = OPEN_HIT
+        elif known_water >> i & 1:
+            state[i] = MISS
+    return state
+
+
+def information_gain(index, state, lengths):
+    """Expected drop in fleet entropy, in nats, from firing at each cell; -inf on shot cells.
+
+    The fleet posterior is approximated by independent ships, each uniform over
+    its placements that cross no miss or sunk ship, so its entropy is
+    sum(count * log(placements)) over the remaining ship lengths. A miss rules
+    out the placements covering the cell; a hit pins one ship (picked in
+    proportion to how many of its placements cover the cell) to them.
+    """
+    blocked = (state == MISS) | (state == HIT)
+    valid = index.matrix @ blocked == 0
+
+    h_miss = 0.0
+    p_miss = 1.0
+    hit_terms = []
+    for length, count in lengths.items():
+        rows = index.rows[length]
+        total = max(valid[rows].sum(), 1)
+        covering = valid[rows] @ index.matrix[rows]
+        log_rest = np.log(np.maximum(total - covering, 1))
+        h_miss = h_miss + count * log_rest
+        p_miss = p_miss * (1 - covering / total) ** count
+        # Weight of this length being the one hit, and the entropy that pins on it
+        hit_terms.append((count * covering / total, np.log(np.maximum(covering, 1)) - log_rest, count * np.log(total)))
+
+    h_now = sum(term[2] for term in hit_terms)
+    odds = sum(term[0] for term in hit_terms)
+    h_hit = h_miss
+    safe_odds = np.where(odds > 0, odds, 1)
+    for weight, pinned, _ in hit_terms:
+        q = weight / safe_odds
+        h_hit = h_hit + q * pinned - np.where(q > 0, q * np.log(np.where(q > 0, q, 1)), 0)
+
+    gain = h_now - (p_miss * h_miss + (1 - p_miss) * h_hit)
+    return np.where(state == UNSHOT, gain, -np.inf), 1 - p_miss
+
+
+def shot_values(index, state, lengths):
+    """One-ply value of each cell (information gain plus HIT_VALUE per expected hit), and hit odds"""
+    gain, p_hit = information_gain(index, state, lengths)
+    return gain + HIT_VALUE * p_hit, p_hit
+
+
+def best_value(index, state, lengths, table=TABLE):
+    """Largest one-ply shot value from a state, via the transposition table"""
+    key = canonical_key(state, sorted(lengths.elements()))
+    value = table.get(key)
+    if value is None:
+        values, _ = shot_values(index, state, lengths)
+        value = float(values.max()) if np.isfinite(values).any() else 0.0
+        table.put(key, value)
+    return value
+
+
+def choose(index, shots, open_hits, remaining, rng, depth=2, width=8, table=TABLE, known_water=0):
+    """Cell with the highest expected shot value over `depth` (1 or 2) plies.
+
+    With depth 2, the `width` best one-ply cells are rescored by adding the
+    best follow-up value after a miss and after a hit, weighted by their
+    odds. Ties are broken with rng.
+    """
+    state = state_of(shots, open_hits, known_water)
+    lengths = Counter(remaining)
+    values, p_hit = shot_values(index, state, lengths)
+    if not np.isfinite(values).any():
+        return None
+    if depth < 2:
+        top = values.max()
+        return rng.choice(np.flatnonzero(values == top).tolist())
+
+    scored = []
+    for cell in np.argsort(-values, kind="stable")[:width].tolist():
+        if not np.isfinite(values[cell]):
+            continue
+        child = state.copy()
+        child[cell] = MISS
+        after_miss = best_value(index, child, lengths, table)
+        child[cell] = OPEN_HIT
+        after_hit = best_value(index, child, lengths, table)
+        scored.append((values[cell] + (1 - p_hit[cell]) * after_miss + p_hit[cell] * after_hit, cell))
+
+    top = max(value for value, _ in scored)
+    return rng.choice([cell for value, cell in scored if value >= top - 1e-12])
@@ -0,0 +1,55 @@
+import threading
+import zlib
+from collections import OrderedDict
+
+# Requests for the same game can arrive on several server threads at once
+# (a double click, a retry, a deferred AI move). Every read or change of a
+# game happens under that game's lock, taken from a fixed set of stripes by
+# game id, so moves on one game are serialized while other games proceed
+# without a global lock. The snapshot thread copies a game under the same
+# lock (recovery.GameStore), so it never sees a move half applied.
+#
+# Clients tag each move with a move id; the result of every tagged move is
+# kept for a while, so a retried or duplicated request gets the original
+# result back instead of being played again. Results are kept per transport,
+# since REST and the WebSocket answer a move in different shapes.
+
+# Transports a move result is recorded for
+REST = "rest"
+WEBSOCKET = "ws"
+
+# Locks shared out between games; two games only contend when they hash alike
+LOCK_STRIPES = 256
+
+# Move results kept for answering retries, across all games
+RESULTS_KEPT = 10_000
+
+
+class MoveGuard:
+    """Per-game lock striping plus a bounded cache of results by (transport, game id, move id)"""
+
+    def __init__(self, stripes=LOCK_STRIPES, kept=RESULTS_KEPT):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._kept = kept
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+
+    def lock(self, game_id):
+        """The lock to hold while reading or changing a game"""
+        return self._locks[zlib.crc32(game_id.encode()) % len(self._locks)]
+
+    def result(self, transport, game_id, move_id):
+        """The result recorded for a move, or None if it is new (or was forgotten)"""
+        if not move_id:
+            return None
+        with self._results_lock:
+            return self._results.get((transport, game_id, move_id))
+
+    def remember(self, transport, game_id, move_id, result):
+        """Record a move's result so a retry on the same transport can be answered with it"""
+        if not move_id:
+            return
+        with self._results_lock:
+            self._results[(transport, game_id, move_id)] = result
+            if len(self._results) > self._kept:
+                self._results.popitem(last=False)
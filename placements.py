@@ -0,0 +1,84 @@
+from functools import lru_cache
+
+import numpy as np
+
+import tables
+from board import ship_placements
+
+
+class PlacementIndex:
+    """Every placement of every ship length on one board size, indexed by cell.
+
+    For each length the index holds the placements' cell bitmasks and cell
+    tuples, and for each cell the ids of the placements covering it. All
+    placements of all lengths are also stacked into one 0/1 matrix (a row
+    per placement, rows[length] slicing out a length's), so per-cell counts
+    over any subset of placements are a single matrix product. It is built
+    once per board size and shared by all games; the matrix comes from the
+    mapped table file when there is one (see tables.py).
+    """
+
+    def __init__(self, size, lengths):
+        self.size = size
+        self.masks = {}
+        self.cells = {}
+        self.covering = {}
+        self.rows = {}
+        start = 0
+        for length in lengths:
+            placements = ship_placements(size, length)
+            self.masks[length] = [mask for mask, _ in placements]
+            self.cells[length] = [cells for _, cells in placements]
+            covering = [[] for _ in range(size * size)]
+            for pid, (_, cells) in enumerate(placements):
+                for cell in cells:
+                    covering[cell].append(pid)
+            self.covering[length] = [tuple(pids) for pids in covering]
+            self.rows[length] = slice(start, start + len(placements))
+            start += len(placements)
+
+        key = f"{size}:{','.join(map(str, lengths))}"
+        self.matrix = tables.shared(f"placement_matrix:{key}", lambda: self._build_matrix(start))
+        self.row_lengths = tables.shared(f"placement_lengths:{key}", lambda: self._build_row_lengths(start))
+
+    def _build_matrix(self, count):
+        matrix = np.zeros((count, self.size * self.size))
+        for length, rows in self.rows.items():
+            for pid, cells in enumerate(self.cells[length], rows.start):
+                matrix[pid, list(cells)] = 1
+        return matrix
+
+    def _build_row_lengths(self, count):
+        row_lengths = np.zeros(count)
+        for length, rows in self.rows.items():
+            row_lengths[rows] = length
+        return row_lengths
+
+    def through(self, length, cells, blocked):
+        """Ids of the placements of a ship that cover any of cells and none of blocked"""
+        covering = self.covering[length]
+        masks = self.masks[length]
+        found = set()
+        for cell in cells:
+            found.update(covering[cell])
+        return [pid for pid in found if not masks[pid] & blocked]
+
+
+@lru_cache(maxsize=None)
+def placement_index(size, lengths):
+    """Shared PlacementIndex for a board size and tuple of ship lengths"""
+    return PlacementIndex(size, lengths)
+
+
+@lru_cache(maxsize=None)
+def parity_masks(size, length):
+    """0/1 rows, one per residue k, marking the cells with (row + col) % length == k.
+
+    Any ship at least length long covers a cell of every residue, so while
+    hunting for such ships the AI only needs to fire at one residue's cells.
+    """
+    def build():
+        r, c = np.divmod(np.arange(size * size), size)
+        return np.array([(r + c) % length == k for k in range(length)], dtype=float)
+
+    return tables.shared(f"parity_masks:{size}:{length}", build)
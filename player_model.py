@@ -0,0 +1,225 @@
+import array
+import atexit
+import contextlib
+import logging
+import os
+import struct
+import threading
+import time
+import uuid
+
+import event_log
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No file locking (Windows): run a single server process there
+
+# File layout: header, then one record per model
+#   header: magic, version, cells per board, model count
+#   record: player uuid bytes (all zero for the global model), games, then one u32 count per cell
+MAGIC = b"BSPM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+RECORD = struct.Struct("<16sI")
+
+GLOBAL = uuid.UUID(int=0).bytes
+
+# Pseudo-games of uniform placement mixed into every model, so a handful of
+# games can't swing the weights far from 1
+SMOOTHING = 2.0
+MAX_WEIGHT = 4.0
+
+# A player's own model is used once they have finished this many games
+MIN_PLAYER_GAMES = 3
+
+logger = logging.getLogger(__name__)
+
+
+class CellCounts:
+    """How often each cell held a ship, over a number of finished games"""
+
+    __slots__ = ("games", "counts", "_weights")
+
+    def __init__(self, cells, games=0, counts=None):
+        self.games = games
+        self.counts = counts if counts is not None else array.array("I", bytes(4 * cells))
+        self._weights = None
+
+    def add(self, cells):
+        self.games += 1
+        for cell in cells:
+            self.counts[cell] += 1
+        self._weights = None
+
+    def merge(self, other):
+        """Add another model's games and counts to this one"""
+        self.games += other.games
+        for cell, count in enumerate(other.counts):
+            if count:
+                self.counts[cell] += count
+        self._weights = None
+
+    def weights(self, parts):
+        """Per-cell multipliers: observed ship frequency over the uniform expectation"""
+        # Rebuilt at most once per finished game, so lookups during a turn are O(1)
+        if self._weights is None:
+            cells = len(self.counts)
+            expected = parts / cells
+            weights = array.array("d", bytes(8 * cells))
+            for i, count in enumerate(self.counts):
+                weight = (count + SMOOTHING * expected) / ((self.games + SMOOTHING) * expected)
+                weights[i] = min(weight, MAX_WEIGHT)
+            self._weights = weights
+        return self._weights
+
+
+class PlacementPrior:
+    """Where players put their ships, learned from finished games.
+
+    One global model plus one per player, kept in memory and saved to a single
+    binary file. Learning a game touches only its ships' cells.
+
+    Every server process learns on its own, so each keeps the games it
+    learned since its last save apart, and saving adds them to what is on
+    disk (under a file lock) instead of overwriting the other processes' work.
+    """
+
+    def __init__(self, path, cells, parts):
+        self.path = path
+        self.cells = cells
+        self.parts = parts  # Ship cells per fleet, for the uniform expectation
+        self.models = {}
+        self._unsaved = {}  # Games learned by this process since its last save, by key
+        self._lock = threading.Lock()
+        self.load()
+
+    def weights(self, player_id=None):
+        """Per-cell prior multipliers for a player, or None before any games were learned"""
+        model = self.models.get(self._key(player_id)) if player_id else None
+        if model is None or model.games < MIN_PLAYER_GAMES:
+            model = self.models.get(GLOBAL)
+        if model is None or model.games == 0:
+            return None
+        return model.weights(self.parts)
+
+    def learn(self, player_id, layout, sizes):
+        """Count one finished game's player fleet; layout is [(row, col, direction), ...]"""
+        size = int(self.cells ** 0.5)
+        cells = []
+        for (row, col, direction), length in zip(layout, sizes):
+            step = 1 if direction == "H" else size
+            cells.extend(range(row * size + col, row * size + col + step * length, step))
+
+        keys = [GLOBAL] + ([self._key(player_id)] if player_id else [])
+        with self._lock:
+            for models in (self.models, self._unsaved):
+                for key in keys:
+                    model = models.get(key)
+                    if model is None:
+                        model = models[key] = CellCounts(self.cells)
+                    model.add(cells)
+
+    def learn_placement(self, player_id, payload, sizes):
+        """learn() from a logged PLACEMENT payload"""
+        self.learn(player_id, event_log.decode_placement(payload)[1], sizes)
+
+    def load(self):
+        models = self._read()
+        with self._lock:
+            self.models = models
+
+    def _read(self):
+        """The models in the file; an unreadable file counts as empty"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+
+        models = {}
+        try:
+            magic, version, cells, count = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION or cells != self.cells:
+                logger.warning("Ignoring placement prior %s: unsupported format", self.path)
+                return {}
+
+            pos = HEADER.size
+            for _ in range(count):
+                key, games = RECORD.unpack_from(data, pos)
+                pos += RECORD.size
+                if pos + 4 * cells > len(data):
+                    raise ValueError("file is truncated")
+                counts = array.array("I")
+                counts.frombytes(data[pos:pos + 4 * cells])
+                pos += 4 * cells
+                models[key] = CellCounts(cells, games, counts)
+        except (struct.error, ValueError) as e:
+            logger.warning("Ignoring placement prior %s: %s", self.path, e)
+            return {}
+        return models
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Held while reading and rewriting the file, so processes don't lose each other's games"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        """Add the games learned since the last save to the file, and pick up other processes' games"""
+        with self._lock:
+            if not self._unsaved:
+                return
+            unsaved, self._unsaved = self._unsaved, {}
+
+        try:
+            with self._file_lock():
+                models = self._read()
+                for key, model in unsaved.items():
+                    models.setdefault(key, CellCounts(self.cells)).merge(model)
+
+                parts = [HEADER.pack(MAGIC, VERSION, self.cells, len(models))]
+                for key, model in models.items():
+                    parts.append(RECORD.pack(key, model.games))
+                    parts.append(model.counts.tobytes())
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(b"".join(parts))
+                os.replace(tmp, self.path)
+        except BaseException:
+            # Keep the games for the next save
+            with self._lock:
+                for key, model in unsaved.items():
+                    self._unsaved.setdefault(key, CellCounts(self.cells)).merge(model)
+            raise
+
+        with self._lock:
+            # The file now holds every process's games; re-add those learned while saving
+            for key, model in self._unsaved.items():
+                models.setdefault(key, CellCounts(self.cells)).merge(model)
+            self.models = models
+
+    def start_autosave(self, interval):
+        """Save every `interval` seconds in a background thread, and at exit"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.save()
+                except Exception:
+                    logger.exception("Saving placement prior failed")
+
+        threading.Thread(target=run, name="placement-prior", daemon=True).start()
+        atexit.register(self.save)
+
+    @staticmethod
+    def _key(player_id):
+        return uuid.UUID(player_id).bytes
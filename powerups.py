@@ -0,0 +1,132 @@
+from functools import lru_cache
+
+import numpy as np
+
+import tables
+
+# A power-up is a pattern of cells around a target, either fired at (SHOT) or
+# scanned for ships without firing (REVEAL), with a number of charges per game
+# and a cooldown in the owner's own turns between uses. Both sides get the
+# same set. Definitions are data: a new weapon is one register() call, and
+# every effect is resolved by BattleshipGame.use_powerup.
+SHOT = "shot"
+REVEAL = "reveal"
+
+POWERUPS = {}
+
+# Targets carry a direction for the line weapons: "H" along the row, "V" down the column
+DIRECTIONS = ("H", "V")
+
+
+class PowerUp:
+    __slots__ = ("name", "kind", "pattern", "charges", "cooldown", "stop_at_hit", "index")
+
+    def __init__(self, name, kind, pattern, charges, cooldown, stop_at_hit, index):
+        self.name = name
+        self.kind = kind
+        self.pattern = pattern
+        self.charges = charges
+        self.cooldown = cooldown
+        self.stop_at_hit = stop_at_hit  # Shots stop at the first ship they hit
+        self.index = index  # Position in the per-side state and in logged POWERUP payloads
+
+    def cells(self, size, row, col, direction):
+        """Cells covered when aimed at (row, col), in firing order"""
+        return self.pattern(size, row, col, direction)
+
+
+def register(name, kind, pattern, charges, cooldown=0, stop_at_hit=False):
+    """Add a power-up; its index is fixed by registration order"""
+    POWERUPS[name] = PowerUp(name, kind, pattern, charges, cooldown, stop_at_hit, len(POWERUPS))
+    return POWERUPS[name]
+
+
+def get(name):
+    return POWERUPS.get(name)
+
+
+def by_index(index):
+    return list(POWERUPS.values())[index]
+
+
+# Per-side state: two bytes per power-up, charges left then turns until ready
+
+def initial_state():
+    state = bytearray()
+    for powerup in POWERUPS.values():
+        state += bytes([powerup.charges, 0])
+    return state
+
+
+def ready(state, powerup):
+    return state[2 * powerup.index] > 0 and state[2 * powerup.index + 1] == 0
+
+
+def tick(state):
+    """Count down every cooldown by one of the owner's turns"""
+    for i in range(1, len(state), 2):
+        if state[i]:
+            state[i] -= 1
+
+
+def spend(state, powerup):
+    state[2 * powerup.index] -= 1
+    state[2 * powerup.index + 1] = powerup.cooldown
+
+
+def describe(state):
+    """{name: {"charges", "cooldown"}} for the frontend"""
+    return {
+        powerup.name: {"charges": state[2 * powerup.index], "cooldown": state[2 * powerup.index + 1]}
+        for powerup in POWERUPS.values()
+    }
+
+
+@lru_cache(maxsize=None)
+def coverage(powerup, size, direction="H"):
+    """0/1 matrix with a row per target cell marking the cells the power-up covers from there"""
+    def build():
+        matrix = np.zeros((size * size, size * size))
+        for target in range(size * size):
+            matrix[target, list(powerup.cells(size, *divmod(target, size), direction))] = 1
+        return matrix
+
+    return tables.shared(f"coverage:{powerup.name}:{size}:{direction}", build)
+
+
+# Patterns: (size, row, col, direction) -> cell indices
+
+@lru_cache(maxsize=None)
+def line(size, row, col, direction):
+    """The whole row (H) or column (V) through the target"""
+    if direction == "H":
+        return tuple(range(row * size, (row + 1) * size))
+    return tuple(range(col, size * size, size))
+
+
+@lru_cache(maxsize=None)
+def ray(size, row, col, direction):
+    """From the target to the right (H) or bottom (V) edge"""
+    if direction == "H":
+        return tuple(range(row * size + col, (row + 1) * size))
+    return tuple(range(row * size + col, size * size, size))
+
+
+def square(radius):
+    """The (2 * radius + 1)-wide block centred on the target, clipped to the board"""
+    @lru_cache(maxsize=None)
+    def pattern(size, row, col, direction):
+        return tuple(
+            r * size + c
+            for r in range(max(0, row - radius), min(size, row + radius + 1))
+            for c in range(max(0, col - radius), min(size, col + radius + 1))
+        )
+
+    pattern.__name__ = f"square_{radius}"
+    return pattern
+
+
+register("air_strike", SHOT, line, charges=1)
+register("bomb", SHOT, square(1), charges=1, cooldown=5)
+register("torpedo", SHOT, ray, charges=2, cooldown=3, stop_at_hit=True)
+register("sonar", REVEAL, square(1), charges=2, cooldown=4)
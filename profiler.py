@@ -0,0 +1,181 @@
+import html
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+# Opt-in sampling profiler for request threads. A chosen fraction of requests
+# is marked for sampling; while any marked request runs, a background thread
+# wakes every INTERVAL seconds, reads the marked threads' Python stacks from
+# sys._current_frames() and counts each stack under the request's label (the
+# route and the game's difficulty). Nothing is traced per call, so sampled
+# requests run at almost full speed, and with a rate of 0 the only cost is one
+# comparison per request. Stacks are served in the collapsed format read by
+# flame graph tools ("frame;frame;frame count") or as a self-contained SVG.
+#
+# Only the request threads are sampled: AI moves chosen in the worker pool
+# (see ai_pool.py) show up as a wait on the pool's result.
+
+# Seconds between samples; the interpreter's switch interval (5 ms by
+# default) bounds how promptly the sampler gets to run anyway
+INTERVAL = 0.005
+
+# Distinct stacks kept per label; samples of new stacks beyond it are counted as truncated
+MAX_STACKS = 10_000
+
+TRUNCATED = "[truncated]"
+
+# Flame graph geometry, in pixels
+SVG_WIDTH = 1200
+SVG_FRAME_HEIGHT = 16
+SVG_MIN_WIDTH = 0.5
+
+
+def frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+def collapse(frame):
+    """Stack of a frame as "outermost;...;innermost" """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """Samples the stacks of a fraction of requests, aggregated in memory by label"""
+
+    def __init__(self, rate=0.0, interval=INTERVAL, max_stacks=MAX_STACKS):
+        self.rate = rate  # Fraction of requests sampled; 0 turns the profiler off
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.requests = 0
+        self.samples = 0
+        self._stacks = {}  # label -> Counter of collapsed stacks
+        self._active = {}  # thread id -> label of the sampled request it is running
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def should_sample(self):
+        """Whether to sample the request about to start"""
+        return self.rate > 0 and random.random() < self.rate
+
+    def begin(self, label):
+        """Start sampling the calling thread under label; returns a token for end()"""
+        token = threading.get_ident()
+        with self._lock:
+            self._active[token] = label
+            self.requests += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+        return token
+
+    def end(self, token):
+        """Stop sampling the thread begin() returned token for"""
+        with self._lock:
+            self._active.pop(token, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for token, label in list(self._active.items()):
+                    frame = frames.get(token)
+                    if frame is None:
+                        # The thread ended without calling end()
+                        del self._active[token]
+                        continue
+                    stacks = self._stacks.setdefault(label, Counter())
+                    stack = collapse(frame)
+                    if stack not in stacks and len(stacks) >= self.max_stacks:
+                        stack = TRUNCATED
+                    stacks[stack] += 1
+                    self.samples += 1
+                if not self._active:
+                    self._wake.clear()
+            del frames
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.requests = 0
+            self.samples = 0
+
+    def stacks(self, match=None):
+        """Counter of collapsed stacks over the labels for which match(label) is true (all without match)"""
+        merged = Counter()
+        with self._lock:
+            for label, stacks in self._stacks.items():
+                if match is None or match(label):
+                    merged.update(stacks)
+        return merged
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate, "interval": self.interval, "requests": self.requests, "samples": self.samples,
+                    "active": len(self._active),
+                    "labels": {"/".join(label): sum(stacks.values()) for label, stacks in self._stacks.items()}}
+
+
+def collapsed_text(stacks):
+    """Collapsed-stack lines, most sampled first"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def flamegraph(stacks, title="Flame graph"):
+    """A self-contained SVG flame graph of collapsed stacks (callers at the bottom)"""
+    # Merge the stacks into a call tree: name -> [count, children]
+    root = [0, {}]
+    for stack, count in stacks.items():
+        node = root
+        node[0] += count
+        for name in stack.split(";"):
+            node = node[1].setdefault(name, [0, {}])
+            node[0] += count
+
+    total = root[0] or 1
+    scale = SVG_WIDTH / total
+    rects = []
+    depth_seen = 0
+
+    def layout(children, x, depth):
+        nonlocal depth_seen
+        for name, (count, grandchildren) in sorted(children.items()):
+            width = count * scale
+            if width >= SVG_MIN_WIDTH:
+                depth_seen = max(depth_seen, depth + 1)
+                rects.append((x, depth, width, name, count))
+                layout(grandchildren, x, depth + 1)
+            x += width
+
+    layout(root[1], 0.0, 0)
+    height = (depth_seen + 2) * SVG_FRAME_HEIGHT
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        f'<text x="4" y="12">{html.escape(title)} ({root[0]} samples)</text>',
+    ]
+    for x, depth, width, name, count in rects:
+        y = height - (depth + 1) * SVG_FRAME_HEIGHT
+        # Warm colours varied by name, so neighbouring frames stand apart
+        hue = 10 + sum(map(ord, name)) % 40
+        label = html.escape(name)
+        chars = int(width / 7)
+        text = label if len(name) <= chars else html.escape(name[:chars - 2]) + ".." if chars > 3 else ""
+        parts.append(
+            f'<g><title>{label} ({count} samples, {count * 100 / total:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{SVG_FRAME_HEIGHT - 1}" '
+            f'fill="hsl({hue},85%,60%)"/>'
+            f'<text x="{x + 3:.1f}" y="{y + SVG_FRAME_HEIGHT - 4}">{text}</text></g>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
@@ -0,0 +1,234 @@
+import base64
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from array import array
+
+import event_log
+
+SNAPSHOT_SUFFIX = ".json"
+CHECKPOINT_PREFIX = "checkpoint-"
+
+logger = logging.getLogger(__name__)
+
+
+def valid_game_id(game_id):
+    """Whether game_id is a canonical UUID string, the only form the server hands out"""
+    try:
+        return str(uuid.UUID(game_id)) == game_id
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+def _encode_value(value):
+    # Boards travel as base64 text; cell logs on large boards are arrays of ints
+    if isinstance(value, (bytes, bytearray)):
+        return {"b64": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, array):
+        return value.tolist()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a snapshot")
+
+
+def _decode_object(obj):
+    if obj.keys() == {"b64"}:
+        return base64.b64decode(obj["b64"])
+    return obj
+
+
+def encode_snapshot(snapshot):
+    """Serialize a BattleshipGame.to_snapshot() dict as JSON bytes"""
+    return json.dumps(snapshot, default=_encode_value, separators=(",", ":")).encode()
+
+
+def decode_snapshot(data):
+    """Inverse of encode_snapshot; loading a snapshot never runs code"""
+    return json.loads(data, object_hook=_decode_object)
+
+
+class SnapshotStore:
+    """One JSON snapshot file per game, written atomically"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, game_id):
+        # Fan out over subdirectories so no single directory holds every game.
+        # Ids are checked with valid_game_id first, so the path stays inside the directory.
+        return os.path.join(self.directory, game_id[:2], game_id + SNAPSHOT_SUFFIX)
+
+    def save(self, snapshot):
+        path = self.path(snapshot["gameId"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(encode_snapshot(snapshot))
+        os.replace(tmp, path)
+
+    def load(self, game_id):
+        try:
+            with open(self.path(game_id), "rb") as f:
+                return decode_snapshot(f.read())
+        except FileNotFoundError:
+            return None
+
+    def save_checkpoint(self, prefix, segment, offset):
+        """Record that a log writer's events up to (segment, offset) are covered by snapshots"""
+        path = os.path.join(self.directory, CHECKPOINT_PREFIX + prefix + ".json")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segment": segment, "offset": offset}, f)
+        os.replace(tmp, path)
+
+    def load_checkpoints(self):
+        """Map of log writer prefix -> (segment, offset)"""
+        checkpoints = {}
+        if not os.path.isdir(self.directory):
+            return checkpoints
+        for name in os.listdir(self.directory):
+            if name.startswith(CHECKPOINT_PREFIX) and name.endswith(".json"):
+                with open(os.path.join(self.directory, name)) as f:
+                    data = json.load(f)
+                prefix = name[len(CHECKPOINT_PREFIX):-len(".json")]
+                checkpoints[prefix] = (data["segment"], data["offset"])
+        return checkpoints
+
+
+class GameStore(dict):
+    """Live games keyed by game id, with lazy crash recovery.
+
+    Games are snapshotted periodically. After a restart, a game missing from
+    memory is rebuilt on first access from its snapshot plus the events it
+    logged after that snapshot. Nothing is loaded at startup, so boot time
+    does not depend on how many games were persisted.
+    """
+
+    def __init__(self, game_factory, snapshot_dir, log_dir, recorder, prior=None, lock=None):
+        super().__init__()
+        self.game_factory = game_factory
+        self.snapshots = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        self.log_dir = log_dir
+        self.recorder = recorder
+        self.prior = prior
+        # game_id -> the lock moves on that game run under; a game is only
+        # copied for a snapshot while holding it, so no move is half applied
+        self.lock = lock or (lambda game_id: contextlib.nullcontext())
+
+        self._restore_lock = threading.Lock()
+        self._tail = None
+
+    def __contains__(self, game_id):
+        return self.get(game_id) is not None
+
+    def __getitem__(self, game_id):
+        game = self.get(game_id)
+        if game is None:
+            raise KeyError(game_id)
+        return game
+
+    def get(self, game_id, default=None):
+        game = dict.get(self, game_id)
+        # Ids come from clients: anything but a canonical UUID is never looked up on disk
+        if game is None and valid_game_id(game_id):
+            game = self._restore(game_id)
+        return default if game is None else game
+
+    def live_games(self):
+        """Games in memory that are not over yet"""
+        return sum(1 for game in list(self.values()) if not game.game_over)
+
+    def _restore(self, game_id):
+        with self._restore_lock:
+            # Another request may have restored it while we waited
+            game = dict.get(self, game_id)
+            if game is not None:
+                return game
+
+            game = self._load_snapshot(game_id)
+            events = self._log_tail().pop(game_id, [])
+            if game is not None:
+                snapshot_seq = game.seq
+                for seq, event_type, payload in events:
+                    if seq >= snapshot_seq:
+                        game.apply_event(event_type, payload)
+            elif events and events[0][0] == 0:
+                # Created after the last snapshot: the log holds the whole game
+                game = self.game_factory.from_events(
+                    [(event_type, payload) for _, event_type, payload in events], game_id=game_id)
+            else:
+                return None
+
+            # Record (and learn) from here on as if the game had never left memory
+            game.recorder = self.recorder
+            game.prior = self.prior
+            dict.__setitem__(self, game_id, game)
+            return game
+
+    def _load_snapshot(self, game_id):
+        """The game rebuilt from its snapshot, or None if it has no usable one"""
+        if not self.snapshots:
+            return None
+        try:
+            snapshot = self.snapshots.load(game_id)
+            return self.game_factory.from_snapshot(snapshot) if snapshot is not None else None
+        except Exception as e:
+            # From an older version, or corrupt: the game is treated as gone
+            logger.warning("Ignoring snapshot of game %s: %s: %s", game_id, type(e).__name__, e)
+            return None
+
+    def _log_tail(self):
+        """Events logged after each writer's last checkpoint, grouped by game (read once)"""
+        if self._tail is None:
+            checkpoints = self.snapshots.load_checkpoints() if self.snapshots else {}
+            tail = {}
+            for path in event_log.list_segments(self.log_dir) if self.log_dir else []:
+                name = os.path.basename(path)
+                offset = 0
+                checkpoint = checkpoints.get(event_log.segment_prefix(path))
+                if checkpoint is not None:
+                    segment, checkpoint_offset = checkpoint
+                    if name < segment:
+                        continue
+                    if name == segment:
+                        offset = checkpoint_offset
+                for game_id, seq, event_type, payload, _ in event_log.read_segment(path, offset):
+                    tail.setdefault(game_id, []).append((seq, event_type, payload))
+            self._tail = tail
+        return self._tail
+
+    def snapshot_all(self):
+        """Snapshot every game that changed since its last snapshot"""
+        # Everything logged before this point is either in a snapshot taken
+        # below or has a seq at least that of its game's snapshot
+        checkpoint = self.recorder.checkpoint() if self.recorder is not None else None
+
+        saved = 0
+        for game in list(self.values()):
+            # A move records its event before changing the boards, so the game
+            # is only consistent with its seq between moves
+            with self.lock(game.game_id):
+                if game.seq == game.snapshot_seq:
+                    continue
+                snapshot = game.to_snapshot()
+            self.snapshots.save(snapshot)
+            game.snapshot_seq = snapshot["seq"]
+            saved += 1
+
+        if checkpoint is not None:
+            self.snapshots.save_checkpoint(self.recorder.prefix, *checkpoint)
+        return saved
+
+    def start_snapshots(self, interval):
+        """Snapshot changed games every `interval` seconds in a background thread"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.snapshot_all()
+                except Exception:
+                    logger.exception("Snapshot round failed")
+
+        threading.Thread(target=run, name="game-snapshots", daemon=True).start()
@@ -13,6 +13,15 @@ let navyScore = 0;
 let pirateScore = 0;
 let airStrikeAvailable = true; // Air Strike power-up
 let airStrikeMode = false; // Whether player is in air strike mode
+let powerUps = {}; // Charges and cooldown of each power-up, from the server
+let powerUpMode = null; // Power-up the player is aiming, if any
+let gameEvents = null; // Server-Sent Events stream carrying AI moves
+let pushReady = false; // Whether the server can push AI moves to us
+let awaitingAIMove = false; // An AI move was deferred to the event stream
+let bufferedAIMove = null; // An AI move pushed before the answer to the move it replies to was handled
+let gameOverHandled = false; // The current game's result has been counted and shown
+let moveInFlight = false; // A move is awaiting the server's answer; clicks meanwhile are ignored
+const BUSY_RETRIES = 3; // Times a move turned away by a busy server is sent again
 
 // DOM Elements
 const setupSection = document.getElementById('game-setup');
@@ -27,6 +36,7 @@ const resetButton = document.getElementById('reset-button');
 const startButton = document.getElementById('start-button');
 const newGameButton = document.getElementById('new-game-button');
 const airStrikeButton = document.getElementById('air-strike-button');
+const powerUpButtons = document.getElementById('powerup-buttons');
 const turnIndicator = document.getElementById('turn-indicator');
 const gameMessage = document.getElementById('game-message');
 const gameOverModal = document.getElementById('game-over-modal');
@@ -38,11 +48,83 @@ const playAgainButton = document.getElementById('play-again-button');
 const navyScoreDisplay = document.getElementById('navy-score');
 const pirateScoreDisplay = document.getElementById('pirate-score');
 
-// Sound effects
-const splashSound = document.getElementById('splash-sound');
-const explosionSound = document.getElementById('explosion-sound');
-const victorySound = document.getElementById('victory-sound');
-const defeatSound = document.getElementById('defeat-sound');
+// Sound effects, fetched and decoded on demand
+const TOTAL_SHIP_PARTS = SHIP_SIZES.reduce((total, size) => total + size, 0);
+const ENDGAME_PRELOAD_HITS = 4; // Fetch the game over tracks this many hits before the end
+const soundManager = createSoundManager(document.getElementById('audio-assets').dataset);
+
+// Audio manager: short effects are decoded once into Web Audio buffers and
+// replayed from memory, so overlapping hits don't wait on an <audio> element.
+// Nothing is downloaded until it is first needed.
+function createSoundManager(urls) {
+    const AudioContextClass = window.AudioContext || window.webkitAudioContext;
+    const buffers = {}; // name -> Promise of a decoded AudioBuffer (or null)
+    let context = null;
+    
+    // Browsers only allow audio to start after a user gesture, so create lazily
+    function getContext() {
+        if (!context && AudioContextClass) {
+            context = new AudioContextClass();
+        }
+        if (context && context.state === 'suspended') {
+            context.resume();
+        }
+        return context;
+    }
+    
+    function load(name) {
+        if (!buffers[name]) {
+            const ctx = getContext();
+            if (!ctx || !urls[name]) return Promise.resolve(null);
+            
+            buffers[name] = fetch(urls[name])
+                .then(response => {
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    return response.arrayBuffer();
+                })
+                // Callback form of decodeAudioData for older Safari
+                .then(data => new Promise((resolve, reject) => ctx.decodeAudioData(data, resolve, reject)))
+                .catch(error => {
+                    console.log(`Couldn't load ${name} sound:`, error);
+                    delete buffers[name];
+                    return null;
+                });
+        }
+        return buffers[name];
+    }
+    
+    return {
+        // Start fetching and decoding sounds ahead of their first use
+        preload(names) {
+            names.forEach(load);
+        },
+        
+        play(name) {
+            if (!AudioContextClass) {
+                // No Web Audio support: fall back to a one-off <audio> element
+                if (urls[name]) {
+                    new Audio(urls[name]).play().catch(error => console.log("Audio playback error:", error));
+                }
+                return;
+            }
+            
+            load(name).then(buffer => {
+                if (!buffer) return;
+                const source = context.createBufferSource();
+                source.buffer = buffer;
+                source.connect(context.destination);
+                source.start();
+            });
+        }
+    };
+}
+
+// Fetch the game over tracks once either side is close to winning
+function preloadEndgameSounds(playerHits, aiHits) {
+    if (Math.max(playerHits, aiHits) >= TOTAL_SHIP_PARTS - ENDGAME_PRELOAD_HITS) {
+        soundManager.preload(['victory', 'defeat']);
+    }
+}
 
 // Initialize the game
 function init() {
@@ -53,18 +135,71 @@ function init() {
     updateScoreboard();
 }
 
+// Board model: each board's cell elements by index, so lookups skip the DOM
+// query, and the cell classes updateGameState has applied, one bit per entry
+// of CELL_CLASSES. State payloads are diffed against the model and only the
+// changed cells are patched, batched into one animation frame.
+const CELL_CLASSES = [['ship', 'navy-ship'], ['hit'], ['miss'], ['revealed-ship'], ['revealed-water'], ['scanned']];
+const CELL_SHIP = 1, CELL_HIT = 2, CELL_MISS = 4, CELL_REVEALED_SHIP = 8, CELL_REVEALED_WATER = 16, CELL_SCANNED = 32;
+const boardCells = new Map();
+const boardModels = new Map();
+const pendingPatches = new Map(); // board -> Map of cell index -> flags to add
+let patchFrame = null;
+
 // Create a grid of cells
 function createGrid(gridElement) {
     gridElement.innerHTML = '';
+    const cells = [];
+    const fragment = document.createDocumentFragment();
     for (let row = 0; row < GRID_SIZE; row++) {
         for (let col = 0; col < GRID_SIZE; col++) {
             const cell = document.createElement('div');
             cell.className = 'cell';
             cell.dataset.row = row;
             cell.dataset.col = col;
-            gridElement.appendChild(cell);
+            cells.push(cell);
+            fragment.appendChild(cell);
         }
     }
+    gridElement.appendChild(fragment);
+    
+    boardCells.set(gridElement, cells);
+    boardModels.set(gridElement, new Uint8Array(GRID_SIZE * GRID_SIZE));
+    pendingPatches.delete(gridElement);
+}
+
+// Record the flags a cell should gain, to be applied on the next frame
+function queueCellPatch(board, index, flags) {
+    const model = boardModels.get(board);
+    const added = flags & ~model[index];
+    if (!added) return;
+    
+    model[index] |= added;
+    if (!pendingPatches.has(board)) {
+        pendingPatches.set(board, new Map());
+    }
+    const patches = pendingPatches.get(board);
+    patches.set(index, (patches.get(index) || 0) | added);
+    
+    if (patchFrame === null) {
+        patchFrame = requestAnimationFrame(flushCellPatches);
+    }
+}
+
+// Apply every queued cell patch
+function flushCellPatches() {
+    patchFrame = null;
+    pendingPatches.forEach((patches, board) => {
+        const cells = boardCells.get(board);
+        patches.forEach((flags, index) => {
+            CELL_CLASSES.forEach((classes, bit) => {
+                if (flags & (1 << bit)) {
+                    cells[index].classList.add(...classes);
+                }
+            });
+        });
+    });
+    pendingPatches.clear();
 }
 
 // Setup event listeners for game controls
@@ -87,6 +222,7 @@ function setupEventListeners() {
     
     // New game
     newGameButton.addEventListener('click', () => {
+        closeGameEvents();
         showSection(setupSection);
         resetPlacement();
     });
@@ -94,6 +230,7 @@ function setupEventListeners() {
     // Play again after game over
     playAgainButton.addEventListener('click', () => {
         gameOverModal.classList.remove('active');
+        closeGameEvents();
         showSection(setupSection);
         resetPlacement();
     });
@@ -101,6 +238,12 @@ function setupEventListeners() {
     // Air Strike activation
     airStrikeButton.addEventListener('click', toggleAirStrike);
     
+    // Other power-ups; the buttons are built from the game state
+    powerUpButtons.addEventListener('click', (event) => {
+        const button = event.target.closest('[data-power-up]');
+        if (button) togglePowerUp(button.dataset.powerUp);
+    });
+    
     // Setup drag and drop for ships
     setupDragAndDrop();
     
@@ -271,7 +414,9 @@ function isValidPlacement(cells) {
 
 // Get a cell element by row and column
 function getCellElement(board, row, col) {
-    return board.querySelector(`.cell[data-row="${row}"][data-col="${col}"]`);
+    if (row < 0 || row >= GRID_SIZE || col < 0 || col >= GRID_SIZE) return null;
+    const cells = boardCells.get(board);
+    return cells ? cells[row * GRID_SIZE + col] || null : null;
 }
 
 // Reset ship placement
@@ -413,10 +558,14 @@ function startGame() {
     // Clear boards
     createGrid(playerBoard);
     createGrid(aiBoard);
+    gameOverHandled = false;
     
     // Hide setup, show gameplay
     showSection(gameplaySection);
     
+    // Starting the battle is a user gesture, so audio can be unlocked here
+    soundManager.preload(['explosion', 'splash']);
+    
     // Start new game with selected difficulty
     const difficulty = difficultySelect.value;
     fetch('/new_game', {
@@ -447,6 +596,7 @@ function startGame() {
     .then(data => {
         if (data.status === 'success') {
             updateGameState(data.gameState);
+            openGameEvents();
             turnIndicator.textContent = 'Your Turn';
             turnIndicator.classList.remove('ai-turn');
             gameMessage.textContent = 'Game started! Click on the enemy board to fire.';
@@ -487,11 +637,7 @@ function handleAIBoardClick(event) {
             if (data.hit) {
                 cell.classList.add('hit');
                 
-                try {
-                    explosionSound.play();
-                } catch (error) {
-                    console.log("Couldn't play explosion sound:", error);
-                }
+                soundManager.play('explosion');
                 
                 if (data.shipSunk) {
                     gameMessage.textContent = `You sunk the enemy's ${data.shipName}!`;
@@ -519,11 +665,7 @@ function handleAIBoardClick(event) {
             } else {
                 cell.classList.add('miss');
                 
-                try {
-                    splashSound.play();
-                } catch (error) {
-                    console.log("Couldn't play splash sound:", error);
-                }
+                soundManager.play('splash');
                 
                 gameMessage.textContent = 'Miss! AI\'s turn.';
                 gameMessage.style.color = 'var(--info)';
@@ -540,11 +682,7 @@ function handleAIBoardClick(event) {
                             playerCell.classList.add('hit');
                         }
                         
-                        try {
-                            explosionSound.play();
-                        } catch (error) {
-                            console.log("Couldn't play explosion sound:", error);
-                        }
+                        soundManager.play('explosion');
                         
                         if (aiShot.shipSunk) {
                             gameMessage.textContent = `The enemy sunk your ${aiShot.shipName || "ship"}!`;
@@ -576,11 +714,7 @@ function handleAIBoardClick(event) {
                             playerCell.classList.add('miss');
                         }
                         
-                        try {
-                            splashSound.play();
-                        } catch (error) {
-                            console.log("Couldn't play splash sound:", error);
-                        }
+                        soundManager.play('splash');
                         
                         gameMessage.textContent = 'The enemy missed! Your turn.';
                         gameMessage.style.color = 'var(--navy-primary)';
@@ -619,56 +753,64 @@ function handleAIBoardClick(event) {
 function updateGameState(gameState) {
     if (!gameState) return;
     
-    // Check for game over state first
-    if (gameState.gameOver) {
-        handleGameOver(gameState.winner);
-        return;
-    }
-    
-    // Update player board
+    // Diff both boards against the model and queue only the cells that changed
     for (let row = 0; row < GRID_SIZE; row++) {
         for (let col = 0; col < GRID_SIZE; col++) {
-            const cell = getCellElement(playerBoard, row, col);
+            const index = row * GRID_SIZE + col;
             
-            // Update ship cells
-            if (gameState.playerGrid[row][col]) {
-                cell.classList.add('ship');
-                cell.classList.add('navy-ship');
+            // Player board: our ships, the AI's hits and misses, and its sonar scans
+            let flags = gameState.playerGrid[row][col] ? CELL_SHIP : 0;
+            const aiShot = gameState.aiShots[row][col];
+            if (aiShot === true) {
+                flags |= CELL_HIT;
+            } else if (aiShot === false) {
+                flags |= CELL_MISS;
             }
-            
-            // Update hit/miss markers
-            if (gameState.aiShots[row][col] === true) {
-                cell.classList.add('hit');
-            } else if (gameState.aiShots[row][col] === false) {
-                cell.classList.add('miss');
+            if (gameState.aiRevealed && gameState.aiRevealed[row][col] !== null) {
+                flags |= CELL_SCANNED;
             }
-        }
-    }
-    
-    // Update AI board (hide ships but show hits/misses)
-    for (let row = 0; row < GRID_SIZE; row++) {
-        for (let col = 0; col < GRID_SIZE; col++) {
-            const cell = getCellElement(aiBoard, row, col);
+            queueCellPatch(playerBoard, index, flags);
             
-            if (gameState.playerShots[row][col] === true) {
-                cell.classList.add('hit');
-            } else if (gameState.playerShots[row][col] === false) {
-                cell.classList.add('miss');
+            // AI board: ships stay hidden, only our hits, misses and sonar finds show
+            flags = 0;
+            const playerShot = gameState.playerShots[row][col];
+            if (playerShot === true) {
+                flags |= CELL_HIT;
+            } else if (playerShot === false) {
+                flags |= CELL_MISS;
             }
+            if (gameState.playerRevealed && gameState.playerRevealed[row][col] !== null) {
+                flags |= gameState.playerRevealed[row][col] ? CELL_REVEALED_SHIP : CELL_REVEALED_WATER;
+            }
+            queueCellPatch(aiBoard, index, flags);
         }
     }
     
     // Update hit counters
     playerHitsDisplay.textContent = gameState.playerHits;
     aiHitsDisplay.textContent = gameState.aiHits;
+    preloadEndgameSounds(gameState.playerHits, gameState.aiHits);
     
     // Update Air Strike availability
     airStrikeAvailable = gameState.airStrikeAvailable !== undefined ? gameState.airStrikeAvailable : true;
     updateAirStrikeButton();
+    
+    if (gameState.powerUps) {
+        powerUps = gameState.powerUps;
+        updatePowerUpButtons();
+    }
+    
+    if (gameState.gameOver) {
+        handleGameOver(gameState.winner);
+    }
 }
 
 // Handle game over
 function handleGameOver(winner) {
+    // Several paths report the end of a game; count and show it once
+    if (gameOverHandled) return;
+    gameOverHandled = true;
+    
     // Update scores
     if (winner === 'player') {
         navyScore++;
@@ -685,15 +827,7 @@ function handleGameOver(winner) {
             : 'Your fleet has been destroyed by the pirates!';
         
         // Play sound effect
-        try {
-            if (winner === 'player') {
-                victorySound.play();
-            } else {
-                defeatSound.play();
-            }
-        } catch (error) {
-            console.log("Couldn't play game over sound:", error);
-        }
+        soundManager.play(winner === 'player' ? 'victory' : 'defeat');
         
         gameOverModal.classList.add('active');
     }, 1500);
@@ -724,40 +858,6 @@ function updateShipPreview() {
     }
 }
 
-// Setup sound effects for the game
-function setupSoundEffects() {
-    // Create safe play method that won't cause infinite recursion
-    function safePlay(sound) {
-        if (sound && sound.originalPlay) {
-            sound.originalPlay().catch(err => {
-                console.log("Audio playback error:", err);
-                // Fallback - do nothing, continue with the game
-            });
-        }
-    }
-    
-    // Store original methods and replace with safe versions
-    if (splashSound && !splashSound.originalPlay) {
-        splashSound.originalPlay = splashSound.play;
-        splashSound.play = function() { safePlay(this); };
-    }
-    
-    if (explosionSound && !explosionSound.originalPlay) {
-        explosionSound.originalPlay = explosionSound.play;
-        explosionSound.play = function() { safePlay(this); };
-    }
-    
-    if (victorySound && !victorySound.originalPlay) {
-        victorySound.originalPlay = victorySound.play;
-        victorySound.play = function() { safePlay(this); };
-    }
-    
-    if (defeatSound && !defeatSound.originalPlay) {
-        defeatSound.originalPlay = defeatSound.play;
-        defeatSound.play = function() { safePlay(this); };
-    }
-}
-
 // Toggle Air Strike mode
 function toggleAirStrike() {
     if (!airStrikeAvailable) return;
@@ -840,18 +940,11 @@ function executeAirStrike(row, col, targetType) {
     const targetIndex = targetType === 'row' ? row : col;
     
     // Send Air Strike to server
-    fetch('/player_air_strike', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-            gameId: gameId,
-            targetType: targetType,
-            targetIndex: targetIndex
-        })
+    postMove('/player_air_strike', {
+        gameId: gameId,
+        targetType: targetType,
+        targetIndex: targetIndex
     })
-    .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
             updateGameState(data.gameState);
@@ -870,31 +963,7 @@ function executeAirStrike(row, col, targetType) {
             }
             // If game is not over, AI will take its turn
             else {
-                setTimeout(() => {
-                    turnIndicator.textContent = 'AI Turn';
-                    turnIndicator.classList.add('ai-turn');
-                    gameMessage.textContent = 'AI is making a move...';
-                    gameMessage.style.color = 'var(--pirate-primary)';
-                    
-                    // Fetch AI move
-                    fetch('/get_game_state', {
-                        method: "GET",
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.status === 'success') {
-                            updateGameState(data.gameState);
-                            turnIndicator.textContent = 'Your Turn';
-                            turnIndicator.classList.remove('ai-turn');
-                            gameMessage.textContent = 'Your turn to fire!';
-                            gameMessage.style.color = 'var(--navy-primary)';
-                        }
-                    });
-                }, 1500);
+                handleAIReply(data);
             }
         } else {
             gameMessage.textContent = data.message || 'Error executing Air Strike';
@@ -908,6 +977,328 @@ function executeAirStrike(row, col, targetType) {
     });
 }
 
+// Power-up display names; the air strike keeps its own row/column targeting
+const POWER_UP_LABELS = { bomb: 'Bomb', torpedo: 'Torpedo', sonar: 'Sonar' };
+
+// Rebuild the power-up buttons from their charges and cooldowns
+function updatePowerUpButtons() {
+    powerUpButtons.innerHTML = '';
+    Object.keys(POWER_UP_LABELS).forEach(name => {
+        const state = powerUps[name];
+        if (!state) return;
+        
+        const ready = state.charges > 0 && state.cooldown === 0;
+        const button = document.createElement('button');
+        button.className = 'btn power-up' + (ready ? '' : ' disabled') + (powerUpMode === name ? ' active' : '');
+        button.dataset.powerUp = name;
+        button.disabled = !ready;
+        button.textContent = state.cooldown > 0 && state.charges > 0
+            ? `${POWER_UP_LABELS[name]} (ready in ${state.cooldown})`
+            : `${POWER_UP_LABELS[name]} (${state.charges})`;
+        powerUpButtons.appendChild(button);
+    });
+    
+    if (powerUpMode && !(powerUps[powerUpMode] && powerUps[powerUpMode].charges > 0 && powerUps[powerUpMode].cooldown === 0)) {
+        powerUpMode = null;
+        aiBoard.classList.remove('air-strike-mode');
+    }
+}
+
+// Toggle aiming mode for a power-up
+function togglePowerUp(name) {
+    if (airStrikeMode) toggleAirStrike();
+    
+    powerUpMode = powerUpMode === name ? null : name;
+    updatePowerUpButtons();
+    
+    if (powerUpMode) {
+        gameMessage.textContent = name === 'torpedo'
+            ? 'Torpedo: click a cell to fire right from it, shift-click to fire down'
+            : `${POWER_UP_LABELS[name]}: click the centre of the 3x3 area`;
+        gameMessage.style.color = 'var(--pirate-primary)';
+        aiBoard.classList.add('air-strike-mode');
+    } else {
+        gameMessage.textContent = 'Click on a cell to fire a regular shot';
+        gameMessage.style.color = 'var(--navy-primary)';
+        aiBoard.classList.remove('air-strike-mode');
+    }
+}
+
+// Use the aimed power-up at a cell
+function executePowerUp(row, col, direction) {
+    const name = powerUpMode;
+    
+    postMove('/use_powerup', {
+        powerUp: name,
+        row: row,
+        col: col,
+        direction: direction
+    })
+    .then(data => {
+        if (data.status === 'success') {
+            powerUpMode = null;
+            aiBoard.classList.remove('air-strike-mode');
+            updateGameState(data.gameState);
+            
+            if (data.revealed) {
+                const found = data.revealed.filter(cell => cell.ship).length;
+                gameMessage.textContent = `Sonar found ${found} ship cell${found === 1 ? '' : 's'}.`;
+            } else {
+                gameMessage.textContent = `${POWER_UP_LABELS[name]} hit ${data.hitCount} time${data.hitCount === 1 ? '' : 's'}.`;
+                soundManager.play(data.hit ? 'explosion' : 'splash');
+            }
+            gameMessage.style.color = 'var(--success)';
+            
+            if (data.gameState.gameOver) {
+                handleGameOver(data.gameState.winner);
+            } else {
+                handleAIReply(data);
+            }
+        } else {
+            gameMessage.textContent = data.message || 'Error using power-up';
+            gameMessage.style.color = 'var(--danger)';
+        }
+    })
+    .catch(error => {
+        console.error('Power-up error:', error);
+        gameMessage.textContent = `Error: ${error.message}`;
+        gameMessage.style.color = 'var(--danger)';
+    });
+}
+
+// Mark a sunk ship of the player's on their board and in the fleet list
+function markPlayerShipSunk(shipName, shipCells) {
+    (shipCells || []).forEach(shipCell => {
+        const shipCellElement = getCellElement(playerBoard, shipCell.row, shipCell.col);
+        if (shipCellElement) {
+            shipCellElement.classList.add('sunk');
+        }
+    });
+    
+    if (shipName) {
+        const shipIndicator = document.querySelector(`#player-ships .mini-ship[data-ship="${shipName.toLowerCase()}"]`);
+        if (shipIndicator) {
+            shipIndicator.classList.add('sunk');
+        }
+    }
+}
+
+// Show a power-up the AI used on the player board
+function showAIPowerUp(aiShot) {
+    aiShot.results.forEach(cell => {
+        const playerCell = getCellElement(playerBoard, cell.row, cell.col);
+        if (playerCell) {
+            playerCell.classList.add(cell.hit ? 'hit' : 'miss');
+        }
+    });
+    (aiShot.revealed || []).forEach(cell => {
+        const playerCell = getCellElement(playerBoard, cell.row, cell.col);
+        if (playerCell) {
+            playerCell.classList.add('scanned');
+        }
+    });
+    aiShot.sunkShips.forEach(ship => markPlayerShipSunk(ship.shipName, ship.shipCells));
+    
+    const label = POWER_UP_LABELS[aiShot.powerUp] || 'Air Strike';
+    if (aiShot.revealed) {
+        gameMessage.textContent = `The enemy's ${label} scanned your waters! Your turn.`;
+        gameMessage.style.color = 'var(--pirate-primary)';
+    } else if (aiShot.sunkShips.length) {
+        gameMessage.textContent = `The enemy's ${label} sunk your ${aiShot.sunkShips.map(ship => ship.shipName).join(' and ')}!`;
+        gameMessage.style.color = 'var(--danger)';
+    } else {
+        gameMessage.textContent = `The enemy used a ${label} and hit ${aiShot.hitCount} time${aiShot.hitCount === 1 ? '' : 's'}! Your turn.`;
+        gameMessage.style.color = aiShot.hit ? 'var(--danger)' : 'var(--navy-primary)';
+    }
+    if (!aiShot.revealed) {
+        soundManager.play(aiShot.hit ? 'explosion' : 'splash');
+    }
+    
+    turnIndicator.textContent = 'Your Turn';
+    turnIndicator.classList.remove('ai-turn');
+}
+
+// Send a player move and resolve with the server's answer. Each move carries
+// an id so the server can recognise a repeat: a request lost in transit is
+// sent once more with the same id, and the server answers it with the
+// original result instead of playing the move twice. A move turned away
+// because the server is busy (503) is sent again after its Retry-After.
+function postMove(url, payload) {
+    const body = JSON.stringify(Object.assign({ moveId: newMoveId(), push: pushReady }, payload));
+    const send = () => fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: body
+    });
+    const sendUntilAdmitted = (retries) => send()
+        .catch(() => send())
+        .then(response => {
+            if (response.status !== 503 || retries === 0) return response;
+            const wait = parseInt(response.headers.get('Retry-After'), 10) || 1;
+            gameMessage.textContent = `Server busy, retrying in ${wait} s...`;
+            return new Promise(resolve => setTimeout(resolve, wait * 1000))
+                .then(() => sendUntilAdmitted(retries - 1));
+        });
+    
+    moveInFlight = true;
+    return sendUntilAdmitted(BUSY_RETRIES)
+        .then(response => response.json())
+        .finally(() => {
+            // The server pushes a deferred AI move as soon as the response is
+            // sent, so it can arrive first. It is held until the caller's
+            // handler has run: a timer fires after the promise callbacks.
+            setTimeout(() => {
+                moveInFlight = false;
+                flushAIMove();
+            }, 0);
+        });
+}
+
+// Random id for a move
+function newMoveId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+// Open the event stream the server uses to push AI moves
+function openGameEvents() {
+    closeGameEvents();
+    if (!window.EventSource) return;
+    
+    gameEvents = new EventSource('/game_events');
+    
+    gameEvents.addEventListener('ready', () => {
+        pushReady = true;
+        
+        // A move may have been pushed while we were reconnecting
+        if (awaitingAIMove) {
+            resyncGameState();
+        }
+    });
+    
+    gameEvents.addEventListener('aiShot', (event) => {
+        bufferedAIMove = JSON.parse(event.data);
+        if (!moveInFlight) {
+            flushAIMove();
+        }
+    });
+    
+    gameEvents.onerror = () => {
+        // EventSource reconnects on its own; fall back to inline AI moves meanwhile
+        pushReady = false;
+    };
+}
+
+// Close the AI move stream
+function closeGameEvents() {
+    if (gameEvents) {
+        gameEvents.close();
+        gameEvents = null;
+    }
+    pushReady = false;
+    awaitingAIMove = false;
+    bufferedAIMove = null;
+}
+
+// Apply the AI move pushed by the server, if one is waiting
+function flushAIMove() {
+    if (!bufferedAIMove) return;
+    const delta = bufferedAIMove;
+    bufferedAIMove = null;
+    awaitingAIMove = false;
+    applyAIMove(delta);
+}
+
+// Handle the AI's reply to a player action
+function handleAIReply(data) {
+    if (data.aiShotPending) {
+        // The server pushes the move over the event stream as soon as it is ready
+        awaitingAIMove = true;
+        turnIndicator.textContent = 'AI Turn';
+        turnIndicator.classList.add('ai-turn');
+        gameMessage.textContent = 'AI is making a move...';
+        gameMessage.style.color = 'var(--pirate-primary)';
+    } else if (data.aiShot && data.aiShot.status === 'success') {
+        // The move came back inline with the response
+        showAIShot(data.aiShot);
+    }
+}
+
+// Apply an AI move delta pushed by the server
+function applyAIMove(delta) {
+    if (delta.aiShot && delta.aiShot.status === 'success') {
+        showAIShot(delta.aiShot);
+    }
+    
+    playerHitsDisplay.textContent = delta.playerHits;
+    aiHitsDisplay.textContent = delta.aiHits;
+    preloadEndgameSounds(delta.playerHits, delta.aiHits);
+    
+    if (delta.gameOver) {
+        handleGameOver(delta.winner);
+    }
+}
+
+// Fetch the full game state, used when a pushed move may have been missed
+function resyncGameState() {
+    fetch('/get_game_state')
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success' && data.gameState.currentTurn === 'player') {
+            awaitingAIMove = false;
+            updateGameState(data.gameState);
+            turnIndicator.textContent = 'Your Turn';
+            turnIndicator.classList.remove('ai-turn');
+            gameMessage.textContent = 'Your turn to fire!';
+            gameMessage.style.color = 'var(--navy-primary)';
+        }
+    });
+}
+
+// Show the AI's shot on the player board
+function showAIShot(aiShot) {
+    if (aiShot.powerUp) {
+        showAIPowerUp(aiShot);
+        return;
+    }
+    
+    const playerCell = getCellElement(playerBoard, aiShot.row, aiShot.col);
+    
+    if (aiShot.hit) {
+        if (playerCell) {
+            playerCell.classList.add('hit');
+        }
+        
+        soundManager.play('explosion');
+        
+        if (aiShot.shipSunk) {
+            gameMessage.textContent = `The enemy sunk your ${aiShot.shipName || "ship"}!`;
+            gameMessage.style.color = 'var(--danger)';
+            
+            markPlayerShipSunk(aiShot.shipName, aiShot.shipCells);
+        } else {
+            gameMessage.textContent = 'The enemy hit your ship! Your turn.';
+            gameMessage.style.color = 'var(--danger)';
+        }
+    } else {
+        if (playerCell) {
+            playerCell.classList.add('miss');
+        }
+        
+        soundManager.play('splash');
+        
+        gameMessage.textContent = 'The enemy missed! Your turn.';
+        gameMessage.style.color = 'var(--navy-primary)';
+    }
+    
+    turnIndicator.textContent = 'Your Turn';
+    turnIndicator.classList.remove('ai-turn');
+}
+
 // Modify handleAIBoardClick to support Air Strike
 const originalHandleAIBoardClick = handleAIBoardClick;
 
@@ -915,6 +1306,9 @@ const originalHandleAIBoardClick = handleAIBoardClick;
 handleAIBoardClick = function(event) {
     if (!event.target.classList.contains('cell')) return;
     
+    // One move at a time: a double click must not fire twice
+    if (moveInFlight) return;
+    
     const row = parseInt(event.target.dataset.row);
     const col = parseInt(event.target.dataset.col);
     
@@ -925,36 +1319,26 @@ handleAIBoardClick = function(event) {
         return;
     }
     
+    if (powerUpMode) {
+        executePowerUp(row, col, event.shiftKey ? 'V' : 'H');
+        return;
+    }
+    
     // Otherwise, execute normal shot
     if (event.target.classList.contains('hit') || event.target.classList.contains('miss')) return;
     
     turnIndicator.textContent = 'Processing...';
     
     // Send player shot to server
-    fetch('/player_shoot', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-            gameId: gameId,
-            row: row,
-            col: col
-        })
+    postMove('/player_shoot', {
+        gameId: gameId,
+        row: row,
+        col: col
     })
-    .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
             // Play sound effect
-            try {
-                if (data.hit) {
-                    explosionSound.play();
-                } else {
-                    splashSound.play();
-                }
-            } catch (error) {
-                console.log("Couldn't play sound:", error);
-            }
+            soundManager.play(data.hit ? 'explosion' : 'splash');
             
             // Update the board
             updateGameState(data.gameState);
@@ -965,31 +1349,7 @@ handleAIBoardClick = function(event) {
             }
             // If game is not over, AI will take its turn
             else {
-                setTimeout(() => {
-                    turnIndicator.textContent = 'AI Turn';
-                    turnIndicator.classList.add('ai-turn');
-                    gameMessage.textContent = 'AI is making a move...';
-                    gameMessage.style.color = 'var(--pirate-primary)';
-                    
-                    // Fetch AI move
-                    fetch('/get_game_state', {
-                        method: "GET",
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.status === 'success') {
-                            updateGameState(data.gameState);
-                            turnIndicator.textContent = 'Your Turn';
-                            turnIndicator.classList.remove('ai-turn');
-                            gameMessage.textContent = 'Your turn to fire!';
-                            gameMessage.style.color = 'var(--navy-primary)';
-                        }
-                    });
-                }, 1500);
+                handleAIReply(data);
             }
         } else {
             gameMessage.textContent = data.message || 'Error firing shot';
@@ -1006,7 +1366,6 @@ handleAIBoardClick = function(event) {
 // Initialize the game when the page loads
 window.addEventListener('load', () => {
     init();
-    setupSoundEffects();
     showSection(setupSection);
     gameMessage.textContent = `Place your ${SHIP_NAMES[0]} (size ${SHIP_SIZES[0]})`;
 });
\ No newline at end of file
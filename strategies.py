@@ -0,0 +1,475 @@
+import json
+import logging
+from collections import Counter
+
+import numpy as np
+
+import endgame
+import fleets
+import lookahead
+import powerups
+from board import HIT, MISS, SHIP_SIZES, UNSHOT, cells_with, neighbours
+from placements import parity_masks, placement_index
+
+# An AI strategy is a pipeline of stages run in order on one TurnContext.
+# A stage returns a cell to fire at, which ends the turn, or None after
+# (optionally) adjusting ctx.scores for the stages after it. Strategies are
+# looked up by name, so new ones can be registered without touching others.
+STRATEGIES = {}
+
+DEFAULT_STRATEGY = "medium"
+
+# Tunable constants of the scoring stages; python -m tools.tune searches them
+# by self-play and writes a weights file that load_weights() applies
+WEIGHTS = {
+    "hit_weight": 16.0,     # How much likelier a placement is for each open hit it explains (target_solver)
+    "hit_neighbour": 3.0,   # Multiplier next to hits on ships not yet sunk (density)
+    "off_parity": 0.5,      # Multiplier outside the hunted parity class (hunt_density)
+    "edge": 0.8,            # Multiplier on edge cells while a long ship is afloat (avoid_edges)
+    "size_heat": 1.0,       # Strength of the size-weighted placement boost (size_weighted_density)
+    "mirror_hit": 1.1,      # Multiplier around the player's hits, mirrored (mirror_player_hits)
+    "pattern_near": 1.3,    # Multiplier one cell past a pair of player hits (player_patterns)
+    "pattern_far": 1.1,     # ... and two cells past it
+}
+WEIGHTS_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+class TurnContext:
+    """State shared by the stages of one AI turn"""
+
+    __slots__ = ("game", "size", "shots", "rng", "open_cells", "misses", "targets", "scores", "index", "_weights")
+
+    def __init__(self, game):
+        self.game = game
+        self.size = game.size
+        self.shots = game.ai_shots
+        self.rng = game.new_rng()
+        self.open_cells = [i for i, shot in enumerate(self.shots) if shot == UNSHOT]
+        if game.ai_known_water:
+            self.open_cells = [i for i in self.open_cells if not game.ai_known_water >> i & 1]
+        # Cells known to be water (misses, and what sonar found empty), and cells
+        # known to hold a ship not yet sunk (open hits, and what sonar found)
+        self.misses = cells_with(self.shots, MISS) | game.ai_known_water
+        self.targets = game.ai_open_hits
+        if game.ai_known_ships:
+            self.targets |= game.ai_known_ships & ~cells_with(self.shots, HIT)
+        self.scores = [0] * len(self.shots)  # Target score per cell, built up by the stages
+        self.index = placement_index(self.size, tuple(sorted(set(SHIP_SIZES))))
+        self._weights = {}
+
+    def unshot(self):
+        """0/1 array marking the open cells"""
+        return np.frombuffer(self.shots, dtype=np.uint8) == UNSHOT
+
+    def placement_weights(self, sunk=False):
+        """Per row of self.index.matrix: how many remaining ships could lie there.
+
+        A placement counts once per remaining ship of its length, or not at
+        all if it crosses a miss (or, with sunk, a sunk ship's cell).
+        """
+        if sunk not in self._weights:
+            index = self.index
+            shots = np.frombuffer(self.shots, dtype=np.uint8)
+            blocked = bit_array(self.misses, len(shots))
+            if sunk:
+                blocked |= (shots == HIT) & ~bit_array(self.game.ai_open_hits, len(shots))
+            weights = np.zeros(len(index.matrix))
+            for length, count in Counter(self.game.remaining_player_ships).items():
+                weights[index.rows[length]] = count
+            weights[index.matrix @ blocked > 0] = 0
+            self._weights[sunk] = weights
+        return self._weights[sunk]
+
+
+def bit_array(mask, cells):
+    """Boolean array of a cell bitmask"""
+    data = np.frombuffer(mask.to_bytes(cells // 8 + 1, "little"), dtype=np.uint8)
+    return np.unpackbits(data, count=cells, bitorder="little").astype(bool)
+
+
+class Strategy:
+    __slots__ = ("name", "stages", "powerup_policy", "fleet_policy", "offload", "fallback")
+
+    def __init__(self, name, stages, powerup_policy=None, fleet_policy=None, offload=False, fallback=None):
+        self.name = name
+        self.stages = stages
+        self.powerup_policy = powerup_policy
+        self.fleet_policy = fleet_policy  # Places the AI's fleet (see fleets.py); None for uniform random
+        self.offload = offload  # CPU-heavy enough to choose moves in the AI worker pool (see ai_pool.py)
+        self.fallback = fallback  # Cheaper strategy that moves for this one when the server is overloaded (see admission.py)
+
+    def powerup(self, ctx):
+        """(power-up name, row, col, direction) to use this turn instead of a shot, or None"""
+        return self.powerup_policy(ctx) if self.powerup_policy is not None else None
+
+    def choose(self, ctx):
+        """Run the stages until one picks a cell; fire at random if none does"""
+        for stage in self.stages:
+            cell = stage(ctx)
+            if cell is not None:
+                return cell
+        return ctx.rng.choice(ctx.open_cells) if ctx.open_cells else None
+
+
+def register(name, *stages, powerup_policy=None, fleet_policy=None, offload=False, fallback=None):
+    """Add (or replace) a named strategy"""
+    STRATEGIES[name] = Strategy(name, stages, powerup_policy, fleet_policy, offload, fallback)
+    return STRATEGIES[name]
+
+
+def get(name):
+    return STRATEGIES[name]
+
+
+def decide(game, strategy=None):
+    """The AI's move this turn: ("shot", cell), ("powerup", name, row, col, direction), or None.
+
+    strategy names a strategy to move with instead of the game's own.
+    """
+    ctx = TurnContext(game)
+    strategy = get(strategy or game.strategy)
+    action = strategy.powerup(ctx)
+    if action is not None:
+        return ("powerup", *action)
+    cell = strategy.choose(ctx)
+    return ("shot", cell) if cell is not None else None
+
+
+def load_weights(path):
+    """Apply a weights file written by tools.tune; returns whether it was used"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return False
+    except ValueError:
+        logger.warning("Ignoring AI weights %s: not valid JSON", path)
+        return False
+
+    if data.get("version") != WEIGHTS_VERSION:
+        logger.warning("Ignoring AI weights %s: unsupported version %r", path, data.get("version"))
+        return False
+    weights = data.get("weights", {})
+    unknown = set(weights) - set(WEIGHTS)
+    if unknown:
+        logger.warning("AI weights %s: ignoring unknown weights %s", path, ", ".join(sorted(unknown)))
+    WEIGHTS.update({name: float(value) for name, value in weights.items() if name in WEIGHTS})
+    return True
+
+
+# Cell sets used by the opening stages
+
+def corner_cells(size):
+    """One cell in from each corner"""
+    return [1 * size + 1, 1 * size + size - 2, (size - 2) * size + 1, (size - 2) * size + size - 2]
+
+
+def center_cells(size):
+    """The central block of the board (rows and columns 3-6 on a 10x10 board)"""
+    low, high = size * 3 // 10, size * 7 // 10
+    return [r * size + c for r in range(low, high) for c in range(low, high)]
+
+
+# Stages that pick a cell
+
+def target_mode(ctx):
+    """After a hit, fire next to the last hit, along the ship once its orientation is known"""
+    game = ctx.game
+    last = game.ai_last_hit
+    if game.ai_hunt_mode or last < 0:
+        return None
+
+    n = ctx.size
+    adjacent = [i for i in neighbours(n)[last] if ctx.shots[i] == UNSHOT]
+    if game.ai_orientation == "H":
+        aligned = [i for i in adjacent if i // n == last // n]
+    elif game.ai_orientation == "V":
+        aligned = [i for i in adjacent if i % n == last % n]
+    else:
+        aligned = None
+    if aligned:
+        return ctx.rng.choice(aligned)
+    if adjacent:
+        return ctx.rng.choice(adjacent)
+    return None
+
+
+def target_solver(ctx):
+    """While any hit is on a ship not yet sunk, fire where the open hits' ships most likely continue.
+
+    Every placement of a remaining ship that covers an open hit and crosses
+    no miss or sunk ship is a candidate; each counts WEIGHTS["hit_weight"] times more
+    for every further open hit it explains. Hits on two adjacent ships are
+    tracked together until both are sunk. Ship cells found by sonar count
+    as open hits, so they are fired at first.
+    """
+    game = ctx.game
+    open_hits = ctx.targets
+    if not open_hits:
+        return None
+
+    n = ctx.size
+    hits = [i for i in range(n * n) if open_hits >> i & 1]
+    blocked = ctx.misses | (cells_with(ctx.shots, HIT) & ~game.ai_open_hits)
+    index = ctx.index
+
+    hit_weight = WEIGHTS["hit_weight"]
+    scores = [0.0] * (n * n)
+    for length, count in Counter(game.remaining_player_ships).items():
+        masks = index.masks[length]
+        cells = index.cells[length]
+        for pid in index.through(length, hits, blocked):
+            weight = count * hit_weight ** (masks[pid] & open_hits).bit_count()
+            for i in cells[pid]:
+                scores[i] += weight
+
+    top = max((scores[i] for i in ctx.open_cells), default=0)
+    if top <= 0:
+        return None
+    return ctx.rng.choice([i for i in ctx.open_cells if scores[i] == top])
+
+
+def exact_endgame(ctx):
+    """Once few fleet arrangements remain, fire where the most of them put a ship (see endgame.py).
+
+    Turns where the search would be too large are left to the stages after it.
+    """
+    game = ctx.game
+    hits = cells_with(ctx.shots, HIT)
+    solved = endgame.solve(ctx.index, game.remaining_player_ships, ctx.misses | (hits & ~game.ai_open_hits),
+                           game.ai_open_hits, ctx.targets)
+    if solved is None:
+        return None
+    probabilities, _ = solved
+    top = max((probabilities[i] for i in ctx.open_cells), default=0)
+    if top <= 0:
+        return None
+    return ctx.rng.choice([i for i in ctx.open_cells if probabilities[i] >= top - 1e-12])
+
+
+def opening(cells, moves, pick="random"):
+    """During the AI's first `moves` shots, fire at an open cell of cells(size).
+
+    pick is "random", or "best" for the highest-scoring such cell.
+    """
+    def stage(ctx):
+        if len(ctx.game.ai_moves) >= moves:
+            return None
+        candidates = [i for i in cells(ctx.size) if ctx.shots[i] == UNSHOT]
+        if not candidates:
+            return None
+        if pick == "best":
+            return max(candidates, key=ctx.scores.__getitem__)
+        return ctx.rng.choice(candidates)
+
+    stage.__name__ = f"opening_{cells.__name__}"
+    return stage
+
+
+def information_gain(depth=2, width=8):
+    """While hunting, fire where the expected drop in fleet entropy is largest (see lookahead.py)"""
+    def stage(ctx):
+        game = ctx.game
+        if ctx.targets:
+            return None
+        return lookahead.choose(ctx.index, ctx.shots, game.ai_open_hits, game.remaining_player_ships,
+                                ctx.rng, depth=depth, width=width, known_water=game.ai_known_water)
+
+    stage.__name__ = f"information_gain_{depth}ply"
+    return stage
+
+
+def noise(rate):
+    """With probability rate, fire at a random open cell"""
+    def stage(ctx):
+        if ctx.open_cells and ctx.rng.random() < rate:
+            return ctx.rng.choice(ctx.open_cells)
+        return None
+
+    stage.__name__ = f"noise_{rate}"
+    return stage
+
+
+def best(ctx):
+    """Fire at the highest-scoring open cell, breaking ties at random"""
+    scores = ctx.scores
+    top = -1
+    targets = []
+    for i in ctx.open_cells:
+        if scores[i] > top:
+            top = scores[i]
+            targets = [i]
+        elif scores[i] == top:
+            targets.append(i)
+    return ctx.rng.choice(targets) if targets else None
+
+
+# Stages that adjust scores
+
+def _density(ctx, sunk=False):
+    """Per-cell count of the placements of remaining ships covering each open cell.
+
+    Placements crossing a miss (or, with sunk, a sunk ship) are ruled out,
+    and cells next to hits on ships not yet sunk count WEIGHTS["hit_neighbour"] times.
+    """
+    counts = ctx.placement_weights(sunk) @ ctx.index.matrix * ctx.unshot()
+    open_hits = ctx.game.ai_open_hits
+    if open_hits:
+        adjacent = neighbours(ctx.size)
+        boost = WEIGHTS["hit_neighbour"]
+        for i in range(len(counts)):
+            if open_hits >> i & 1:
+                for j in adjacent[i]:
+                    counts[j] *= boost
+    return counts
+
+
+def density(ctx):
+    """Score open cells by how many placements of the remaining ships cover them"""
+    ctx.scores = _density(ctx).tolist()
+
+
+def hunt_density(ctx):
+    """density, ruling out sunk ships' cells and, while hunting, favouring one parity class.
+
+    With no unsunk ship hit, every remaining ship covers a cell of each
+    residue of (row + col) modulo the shortest remaining length, so cells
+    outside one class are scaled by WEIGHTS["off_parity"]. The class kept is the one already shot
+    at most, so the hunt doesn't spread over several classes as the
+    shortest length changes.
+    """
+    scores = _density(ctx, sunk=True)
+    game = ctx.game
+    if not ctx.targets:
+        masks = parity_masks(ctx.size, min(game.remaining_player_ships))
+        off = WEIGHTS["off_parity"]
+        scores *= off + (1 - off) * masks[np.argmax(masks @ ~ctx.unshot())]
+    ctx.scores = scores.tolist()
+
+
+def size_weighted_density(ctx):
+    """Boost cells covered by many placements, counting larger ships for more"""
+    unshot = ctx.unshot()
+    heat = (ctx.placement_weights(sunk=True) * ctx.index.row_lengths) @ ctx.index.matrix * unshot
+    top = heat.max()
+    if top > 0:
+        ctx.scores = (np.array(ctx.scores) * (1 + WEIGHTS["size_heat"] * heat / top * unshot)).tolist()
+
+
+def avoid_edges(ctx):
+    """Edges score lower while a ship of length 4 or more is afloat"""
+    if not any(size >= 4 for size in ctx.game.remaining_player_ships):
+        return None
+    n = ctx.size
+    scores = ctx.scores
+    edge = WEIGHTS["edge"]
+    for i in range(n * n):
+        r, c = divmod(i, n)
+        if r == 0 or r == n - 1 or c == 0 or c == n - 1:
+            scores[i] *= edge
+
+
+def prior(ctx):
+    """Scale scores by where this player (or players in general) tend to put ships"""
+    game = ctx.game
+    weights = game.prior.weights(game.player_id) if game.prior is not None else None
+    if weights is not None:
+        scores = ctx.scores
+        for i in range(len(scores)):
+            scores[i] *= weights[i]
+
+
+def mirror_player_hits(ctx):
+    """Boost the neighbourhoods of the cells where the player has hit the AI's fleet"""
+    game = ctx.game
+    if len(game.player_moves) <= 5:
+        return None
+    n = ctx.size
+    shots = ctx.shots
+    scores = ctx.scores
+    boost = WEIGHTS["mirror_hit"]
+    for source in game.player_moves:
+        if game.player_shots[source] != HIT:
+            continue
+        source_r, source_c = divmod(source, n)
+        for dr in range(-1, 2):
+            for dc in range(-1, 2):
+                r, c = source_r + dr, source_c + dc
+                if 0 <= r < n and 0 <= c < n and shots[r * n + c] == UNSHOT:
+                    scores[r * n + c] *= boost
+
+
+def player_patterns(ctx):
+    """Extend runs of adjacent player hits on the AI's fleet, mirrored onto the AI's shot board"""
+    game = ctx.game
+    if len(game.player_moves) <= 3:
+        return None
+
+    n = ctx.size
+    shots = ctx.shots
+    scores = ctx.scores
+    hits = [divmod(i, n) for i in game.player_moves if game.player_shots[i] == HIT]
+    if len(hits) < 2:
+        return None
+
+    # Each pair of adjacent hits is found from both of its cells, so counts twice
+    hit_set = set(hits)
+    horizontal = []
+    vertical = []
+    for r, c in hits:
+        if (r, c + 1) in hit_set:
+            horizontal.append((r, c, c + 1))
+        if (r, c - 1) in hit_set:
+            horizontal.append((r, c - 1, c))
+        if (r + 1, c) in hit_set:
+            vertical.append((c, r, r + 1))
+        if (r - 1, c) in hit_set:
+            vertical.append((c, r - 1, r))
+
+    # Cells within two of either end of a pair are likely more of the same ship
+    near, far = WEIGHTS["pattern_near"], WEIGHTS["pattern_far"]
+    for r, c1, c2 in horizontal:
+        for start in (c1, c2):
+            for dc in (-2, -1, 1, 2):
+                c = start + dc
+                if 0 <= c < n and shots[r * n + c] == UNSHOT:
+                    scores[r * n + c] *= near if abs(dc) == 1 else far
+    for c, r1, r2 in vertical:
+        for start in (r1, r2):
+            for dr in (-2, -1, 1, 2):
+                r = start + dr
+                if 0 <= r < n and shots[r * n + c] == UNSHOT:
+                    scores[r * n + c] *= near if abs(dr) == 1 else far
+
+
+# Power-up policies: (ctx) -> (name, row, col, direction) or None
+
+def use_powerups(ctx):
+    """While hunting, sonar the block most likely to hold ships; bomb it when sonar isn't ready"""
+    if ctx.targets:
+        return None
+    state = ctx.game.ai_powerups
+    for name in ("sonar", "bomb"):
+        powerup = powerups.get(name)
+        if powerup is not None and powerups.ready(state, powerup):
+            heat = _density(ctx, sunk=True)
+            centre = int(np.argmax(powerups.coverage(powerup, ctx.size) @ heat))
+            return (name, *divmod(centre, ctx.size), "H")
+    return None
+
+
+register("easy", target_mode, noise(0.7), density, best)
+register("medium", target_mode, density, noise(0.3), best)
+# The density-only path: the cheapest sound strategy, and the tier the hard
+# ones fall back to under load
+register("density", target_mode, density, best)
+register("hard", exact_endgame, target_solver, hunt_density, avoid_edges, prior,
+         opening(center_cells, 5), mirror_player_hits, best, powerup_policy=use_powerups,
+         fleet_policy=fleets.anti_density, fallback="density")
+register("extremely_hard", exact_endgame, target_solver, hunt_density, prior, opening(corner_cells, 3),
+         opening(center_cells, 6, pick="best"), player_patterns, size_weighted_density, best,
+         powerup_policy=use_powerups, fleet_policy=fleets.anti_density, fallback="density")
+register("lookahead", exact_endgame, target_solver, information_gain(depth=2, width=8), hunt_density, best,
+         powerup_policy=use_powerups, fleet_policy=fleets.anti_density, offload=True, fallback="density")
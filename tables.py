@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+
+import numpy as np
+
+# Read-only numpy tables the AI derives from the board size alone (placement
+# matrices, parity masks, power-up coverage, ...) can be written once into a
+# binary file by tools.build_tables and memory-mapped by every server worker,
+# so their pages are shared instead of rebuilt in each process. Each table is
+# requested by key through shared(), which falls back to building it when the
+# file is missing or doesn't hold that key.
+#
+# File layout: MAGIC, then a little-endian u32 version and u32 directory length,
+# the JSON directory {"inputs": fingerprint, "tables": {key: {"dtype", "shape",
+# "offset"}}}, and the table data, each table starting on an ALIGN-byte boundary.
+MAGIC = b"BSTABLES"
+VERSION = 2
+ALIGN = 64
+HEADER = struct.Struct("<II")
+
+# Modules whose code and constants the tables are built from; a file built
+# from other versions of them is ignored, so a changed constant (such as
+# fleets.EDGE_AVERSION) can't leave workers on stale tables
+SOURCES = ("board.py", "placements.py", "powerups.py", "lookahead.py", "fleets.py")
+
+logger = logging.getLogger(__name__)
+
+_tables = {}
+_recording = None
+
+
+def shared(key, build):
+    """The table stored under key in the mapped file, or build() when it isn't there"""
+    if _recording is not None:
+        table = _recording[key] = np.ascontiguousarray(build())
+        return table
+    table = _tables.get(key)
+    return table if table is not None else build()
+
+
+@contextmanager
+def recording():
+    """Build every table requested inside the block, ignoring the file, and collect them by key"""
+    global _recording
+    _recording = {}
+    try:
+        yield _recording
+    finally:
+        _recording = None
+
+
+def fingerprint():
+    """Hash of the SOURCES the tables are built from"""
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in SOURCES:
+        with open(os.path.join(root, name), "rb") as f:
+            digest.update(name.encode() + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+def write(path, tables):
+    """Write {key: array} as a table file, atomically"""
+    directory = {}
+    offset = 0
+    for key, table in tables.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        directory[key] = {"dtype": table.dtype.str, "shape": list(table.shape), "offset": offset}
+        offset += table.nbytes
+    header = json.dumps({"inputs": fingerprint(), "tables": directory}, separators=(",", ":")).encode()
+    start = -(-(len(MAGIC) + HEADER.size + len(header)) // ALIGN) * ALIGN
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + HEADER.pack(VERSION, len(header)) + header)
+        for key, table in tables.items():
+            f.seek(start + directory[key]["offset"])
+            f.write(table.tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp, path)
+
+
+def load(path):
+    """Map a table file read-only; returns {key: array}, or None if it is missing, stale or unusable"""
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if data[:len(MAGIC)] != MAGIC:
+        logger.warning("Ignoring table file %s: not a table file", path)
+        return None
+    try:
+        version, length = HEADER.unpack_from(data, len(MAGIC))
+        if version != VERSION:
+            logger.warning("Ignoring table file %s: unsupported version %d", path, version)
+            return None
+        header_end = len(MAGIC) + HEADER.size + length
+        header = json.loads(data[len(MAGIC) + HEADER.size:header_end])
+        if header["inputs"] != fingerprint():
+            logger.warning("Ignoring table file %s: built from other code; rerun tools.build_tables", path)
+            return None
+        start = -(-header_end // ALIGN) * ALIGN
+
+        tables = {}
+        for key, entry in header["tables"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            tables[key] = np.frombuffer(data, dtype, count, start + entry["offset"]).reshape(entry["shape"])
+    except (struct.error, ValueError, KeyError, TypeError) as e:
+        # Corrupt or truncated: every table is built in-process instead
+        logger.warning("Ignoring table file %s: %s: %s", path, type(e).__name__, e)
+        return None
+    return tables
+
+
+def open_file(path):
+    """Serve shared() from a table file; returns whether it was loaded"""
+    tables = load(path)
+    if tables is None:
+        return False
+    _tables.clear()
+    _tables.update(tables)
+    return True
@@ -0,0 +1,219 @@
+"""Build fingerprinted, pre-compressed static assets into static/dist.
+
+- WAV audio is transcoded to MP3 when ffmpeg is available, otherwise
+  re-encoded as mono 16-bit 22.05 kHz WAV
+- Every file is renamed to <name>.<content hash><ext> so it can be cached forever
+- Text assets get .gz (and .br, if the brotli package is installed) variants
+- static/dist/manifest.json maps original names to the built files; app.py
+  uses it to emit URLs, and a front proxy can use it to serve static/dist directly
+
+Usage: python -m tools.build_assets [--static static] [--audio-format auto|mp3|wav]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_VERSION = 1
+DIST_DIR = "dist"
+COMPRESSIBLE = {".css", ".js", ".html", ".svg", ".json", ".txt"}
+
+# Target format for the re-encoded WAV fallback
+WAV_RATE = 22050
+
+CSS_URL = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+
+
+def read_wav(data):
+    """Decode a PCM WAV file into (float samples [frames, channels], sample rate)"""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a WAV file")
+
+    fmt = None
+    pcm = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, pos)
+        body = data[pos + 8:pos + 8 + size]
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", body)
+        elif chunk_id == b"data":
+            pcm = body
+        pos += 8 + size + (size & 1)
+
+    if fmt is None or pcm is None:
+        raise ValueError("Missing fmt or data chunk")
+
+    # Format 1 is PCM; 0xFFFE (extensible) is accepted as PCM too
+    tag, channels, rate, _, _, bits = fmt
+    if tag not in (1, 0xFFFE):
+        raise ValueError(f"Unsupported WAV format {tag}")
+
+    width = bits // 8
+    frames = len(pcm) // (width * channels)
+    raw = np.frombuffer(pcm[:frames * width * channels], dtype=np.uint8).reshape(-1, width)
+    if width == 1:
+        samples = (raw[:, 0].astype(np.float32) - 128) / 128
+    else:
+        # Assemble little-endian signed integers of any width
+        value = np.zeros(len(raw), dtype=np.int64)
+        for i in range(width):
+            value |= raw[:, i].astype(np.int64) << (8 * i)
+        sign = 1 << (8 * width - 1)
+        samples = ((value ^ sign) - sign).astype(np.float32) / sign
+    return samples.reshape(frames, channels), rate
+
+
+def encode_compact_wav(data):
+    """Re-encode a WAV as mono 16-bit PCM at WAV_RATE"""
+    samples, rate = read_wav(data)
+    mono = samples.mean(axis=1)
+
+    # Average blocks of samples when downsampling by an integer factor
+    factor = max(1, rate // WAV_RATE)
+    if factor > 1:
+        mono = mono[:len(mono) // factor * factor].reshape(-1, factor).mean(axis=1)
+        rate //= factor
+
+    pcm = (np.clip(mono, -1, 1) * 32767).astype("<i2").tobytes()
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(pcm), b"WAVE",
+        b"fmt ", 16, 1, 1, rate, rate * 2, 2, 16,
+        b"data", len(pcm)
+    )
+    return header + pcm
+
+
+def encode_mp3(path):
+    """Transcode an audio file to mono 64 kbps MP3 with ffmpeg"""
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "out.mp3")
+        subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-y", "-i", path, "-ac", "1", "-b:a", "64k", out],
+            check=True
+        )
+        with open(out, "rb") as f:
+            return f.read()
+
+
+def transcode_audio(path, audio_format):
+    """Return (bytes, extension) for a built audio file"""
+    if audio_format == "mp3":
+        return encode_mp3(path), ".mp3"
+    with open(path, "rb") as f:
+        return encode_compact_wav(f.read()), ".wav"
+
+
+def fingerprint(name, content):
+    stem, ext = posixpath.splitext(name)
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    return f"{stem}.{digest}{ext}"
+
+
+def rewrite_css_urls(css, name, assets):
+    """Point relative url() references in a stylesheet at built files"""
+    base = posixpath.dirname(name)
+
+    def replace(match):
+        quote, url = match.groups()
+        if re.match(r"^([a-z]+:|/|#)", url):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(base, url))
+        if target not in assets:
+            return match.group(0)
+        built = posixpath.relpath(assets[target]["path"], base)
+        return f"url({quote}{built}{quote})"
+
+    return CSS_URL.sub(replace, css)
+
+
+def write_variants(path, content):
+    """Write pre-compressed variants that are smaller than the original"""
+    encodings = []
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        if len(compressed) < len(content):
+            with open(path + ".br", "wb") as f:
+                f.write(compressed)
+            encodings.append("br")
+
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(compressed) < len(content):
+        with open(path + ".gz", "wb") as f:
+            f.write(compressed)
+        encodings.append("gzip")
+    return encodings
+
+
+def build(static_dir, audio_format):
+    dist = os.path.join(static_dir, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    sources = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            sources.append((os.path.relpath(path, static_dir).replace(os.sep, "/"), path))
+
+    # Stylesheets go last so their url() references can be rewritten
+    sources.sort(key=lambda item: item[0].endswith(".css"))
+
+    assets = {}
+    for name, path in sources:
+        ext = posixpath.splitext(name)[1].lower()
+        if ext == ".wav":
+            content, out_ext = transcode_audio(path, audio_format)
+            out_name = posixpath.splitext(name)[0] + out_ext
+        else:
+            with open(path, "rb") as f:
+                content = f.read()
+            out_name = name
+            if ext == ".css":
+                content = rewrite_css_urls(content.decode("utf-8"), name, assets).encode("utf-8")
+
+        built = fingerprint(out_name, content)
+        out_path = os.path.join(dist, *built.split("/"))
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "wb") as f:
+            f.write(content)
+
+        encodings = write_variants(out_path, content) if ext in COMPRESSIBLE else []
+        assets[name] = {"path": built, "size": len(content), "encodings": encodings}
+        print(f"{name:<28} {os.path.getsize(path):>9} -> {len(content):>9}  {built}")
+
+    manifest = {"version": MANIFEST_VERSION, "prefix": "/assets/", "assets": assets}
+    with open(os.path.join(dist, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--static", default="static")
+    parser.add_argument("--audio-format", choices=["auto", "mp3", "wav"], default="auto")
+    args = parser.parse_args()
+
+    audio_format = args.audio_format
+    if audio_format == "auto":
+        audio_format = "mp3" if shutil.which("ffmpeg") else "wav"
+    build(args.static, audio_format)
+
+
+if __name__ == "__main__":
+    main()
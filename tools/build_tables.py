@@ -0,0 +1,54 @@
+"""Build the shared AI table file that server workers memory-map (see tables.py).
+
+Builds every table the AI derives from the board size alone: placement
+matrices, parity masks, power-up coverage, rotation and reflection
+permutations, and the fleet placement tables. The server maps the file
+at startup (BATTLESHIP_TABLES_FILE), so its workers share the pages
+instead of each building its own copy; without the file they build the
+tables on first use, as before.
+
+Usage: python -m tools.build_tables [--size 10 ...] [--out data/tables.bin]
+"""
+import argparse
+import time
+
+import fleets
+import lookahead
+import powerups
+import tables
+from board import GRID_SIZE, SHIP_SIZES
+from config import TABLES_FILE
+from placements import parity_masks, placement_index
+
+
+def build(size):
+    """Request every table for a board size (inside tables.recording(), to collect them)"""
+    placement_index(size, tuple(sorted(set(SHIP_SIZES))))
+    for length in range(2, max(SHIP_SIZES) + 1):
+        parity_masks(size, length)
+    for powerup in powerups.POWERUPS.values():
+        for direction in powerups.DIRECTIONS:
+            powerups.coverage(powerup, size, direction)
+    lookahead.symmetries(size)
+    fleets.placement_table(size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, action="append", dest="sizes",
+                        help=f"board size to build for (repeatable; default {GRID_SIZE})")
+    parser.add_argument("--out", default=TABLES_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with tables.recording() as built:
+        for size in args.sizes or [GRID_SIZE]:
+            build(size)
+    elapsed = time.perf_counter() - start
+    tables.write(args.out, built)
+    total = sum(table.nbytes for table in built.values())
+    print(f"Wrote {len(built)} tables ({total / 1024:.0f} KiB) to {args.out} in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
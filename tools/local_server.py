@@ -0,0 +1,97 @@
+"""Run app.py on localhost in a child process for tools and benchmarks.
+
+Usage: python -m tools.local_server [--port 5000]
+"""
+import argparse
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+
+def free_port():
+    """Ask the OS for an unused localhost port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(port):
+    """Serve the app with a threaded HTTP/1.1 server (keep-alive enabled)"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+def cpu_seconds(pid):
+    """Return user+system CPU time of a process, or None if unavailable"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def rss_bytes(pid):
+    """Return the resident set size of a process, or None if unavailable"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+@contextlib.contextmanager
+def running_server(port=None, env=None):
+    """Start the app in a child process and yield (base_url, process).
+
+    The server keeps its event log, snapshots, placement prior and session
+    key in a temporary directory, so a run leaves nothing behind in data/
+    (env can still point any of them elsewhere).
+    """
+    port = port or free_port()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    tmp = tempfile.TemporaryDirectory()
+    isolated = {
+        "BATTLESHIP_EVENT_LOG": os.path.join(tmp.name, "events"),
+        "BATTLESHIP_SNAPSHOT_DIR": os.path.join(tmp.name, "snapshots"),
+        "BATTLESHIP_PRIOR_FILE": os.path.join(tmp.name, "placement_prior.bin"),
+        "BATTLESHIP_SECRET_KEY_FILE": os.path.join(tmp.name, "secret_key"),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "tools.local_server", "--port", str(port)],
+        cwd=root,
+        env={**os.environ, **isolated, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 15
+        while True:
+            try:
+                urllib.request.urlopen(base_url + "/", timeout=1).close()
+                break
+            except OSError:
+                if proc.poll() is not None or time.time() > deadline:
+                    raise RuntimeError("Local server failed to start")
+                time.sleep(0.1)
+        yield base_url, proc
+    finally:
+        proc.terminate()
+        proc.wait()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=5000)
+    serve(parser.parse_args().port)
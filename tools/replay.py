@@ -0,0 +1,90 @@
+"""Reconstruct games from the append-only event log.
+
+Usage:
+  python -m tools.replay --list                  list logged games
+  python -m tools.replay GAME_ID [--turn N]      show a game's boards after N moves
+  python -m tools.replay --bench                 replay every game and report events/s
+"""
+import argparse
+import time
+
+import event_log
+from config import EVENT_LOG_DIR
+from game import BattleshipGame
+
+
+def replay(directory, game_id, turn=None):
+    """Rebuild one game as it was after `turn` moves (or at the end of its log)"""
+    events = event_log.events_by_game(directory).get(game_id)
+    if not events:
+        raise SystemExit(f"No events for game {game_id}")
+    return BattleshipGame.from_events(events, game_id=game_id, turn=turn)
+
+
+def render(grid, shots):
+    """Text board from get_game_state() grids: ship letters, X for hits, o for misses"""
+    lines = ["   " + " ".join(str(c) for c in range(len(grid)))]
+    for r in range(len(grid)):
+        cells = []
+        for c in range(len(grid)):
+            if shots[r][c] is True:
+                cells.append("X")
+            elif shots[r][c] is False:
+                cells.append("o")
+            else:
+                cells.append(grid[r][c] or ".")
+        lines.append(f"{r:>2} " + " ".join(cells))
+    return "\n".join(lines)
+
+
+def show(game):
+    print(f"difficulty: {game.difficulty}  seed: {game.seed}  turn: {game.current_turn}  "
+          f"player hits: {game.player_hits}  AI hits: {game.ai_hits}  winner: {game.winner}")
+    state = game.get_game_state()
+    print("\nPlayer fleet (AI shots):")
+    print(render(state["playerGrid"], state["aiShots"]))
+    print("\nAI fleet (player shots):")
+    print(render(state["aiGrid"], state["playerShots"]))
+
+
+def list_games(directory):
+    for game_id, events in event_log.events_by_game(directory).items():
+        moves = sum(1 for event_type, _ in events if event_type in event_log.MOVE_EVENTS)
+        finished = any(event_type == event_log.RESULT for event_type, _ in events)
+        print(f"{game_id}  {moves:>4} moves  {'finished' if finished else 'in progress'}")
+
+
+def bench(directory):
+    """Replay every logged game, timing only the replay (not file reading)"""
+    games = event_log.events_by_game(directory)
+    total = sum(len(events) for events in games.values())
+
+    start = time.perf_counter()
+    for game_id, events in games.items():
+        BattleshipGame.from_events(events, game_id=game_id)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(games)} games, {total} events in {elapsed:.3f}s: {total / elapsed:,.0f} events/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("game_id", nargs="?")
+    parser.add_argument("--turn", type=int)
+    parser.add_argument("--dir", default=EVENT_LOG_DIR)
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--bench", action="store_true")
+    args = parser.parse_args()
+
+    if args.list:
+        list_games(args.dir)
+    elif args.bench:
+        bench(args.dir)
+    elif args.game_id:
+        show(replay(args.dir, args.game_id, args.turn))
+    else:
+        parser.error("give a game id, --list or --bench")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Tune the AI's scoring weights by self-play.
+
+Runs a (1 + lambda) evolution strategy over strategies.WEIGHTS, starting
+from the weights the server would load (WEIGHTS_FILE, or the built-in
+defaults without it): each
+generation perturbs the best weights so far, plays every candidate and the
+incumbent on the same fresh set of headless games (in parallel), and moves
+to the candidate that sinks the player's fleet in the fewest shots, but only
+if it beats the incumbent by more than the game-to-game noise. The player
+side fires at random, so the stages that mirror player hits have something
+to work with. Progress is checkpointed after every generation, and the best
+weights are written to a versioned file that the server loads at startup.
+
+Usage: python -m tools.tune [--generations 20] [--population 8] [--games 200]
+                            [--strategy hard --strategy extremely_hard] [--resume]
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+import strategies
+from benchmarks.strategies import random_fleet
+from config import WEIGHTS_FILE
+from game import BattleshipGame
+
+CHECKPOINT_FILE = os.path.join("data", "tune_checkpoint.json")
+
+# Step size of the log-normal perturbations, and its bounds as it adapts
+INITIAL_SIGMA = 0.3
+MIN_SIGMA = 0.02
+MAX_SIGMA = 1.0
+
+# Standard errors (of the per-game shot difference) a candidate must win by
+MIN_EDGE = 2.0
+
+
+def play(weights, strategy, seeds):
+    """Shots the AI needed to win each seeded game (board cells if it lost)"""
+    strategies.WEIGHTS.update(weights)
+    shots = []
+    for seed in seeds:
+        game = BattleshipGame(strategy=strategy, seed=seed)
+        game.validate_player_ship_placement(random_fleet(random.Random(seed), game.size))
+        player_targets = list(range(game.size * game.size))
+        random.Random(-seed).shuffle(player_targets)
+        while not game.game_over:
+            game.player_shoot(*divmod(player_targets.pop(), game.size))
+            if not game.game_over:
+                game.ai_shoot()
+        shots.append(len(game.ai_moves) if game.winner == "ai" else game.size * game.size)
+    return shots
+
+
+def _play(task):
+    return task[0], play(*task[1:])
+
+
+def evaluate(pool, candidates, strategy_names, seeds, chunk):
+    """Shots to win of each candidate, per game, in the same game order for all"""
+    tasks = [
+        (i, weights, name, seeds[start:start + chunk])
+        for i, weights in enumerate(candidates)
+        for name in strategy_names
+        for start in range(0, len(seeds), chunk)
+    ]
+    shots = [[] for _ in candidates]
+    for i, result in pool.imap(_play, tasks):
+        shots[i].extend(result)
+    return shots
+
+
+def edge(incumbent, candidate):
+    """How many standard errors fewer shots the candidate took, game for game"""
+    diffs = [a - b for a, b in zip(incumbent, candidate)]
+    spread = statistics.stdev(diffs) / math.sqrt(len(diffs))
+    return statistics.mean(diffs) / spread if spread else 0.0
+
+
+def perturb(rng, weights, sigma):
+    return {name: value * math.exp(rng.gauss(0, sigma)) for name, value in weights.items()}
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=8, help="candidates per generation")
+    parser.add_argument("--games", type=int, default=200, help="games per candidate and strategy")
+    parser.add_argument("--strategy", action="append", dest="strategies",
+                        help="strategy to tune for (repeatable; default hard and extremely_hard)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--out", default=WEIGHTS_FILE)
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    args = parser.parse_args()
+    strategy_names = args.strategies or ["hard", "extremely_hard"]
+
+    # Start from the weights the server would load, so a rerun refines earlier tuning
+    if WEIGHTS_FILE and strategies.load_weights(WEIGHTS_FILE):
+        print(f"Starting from the weights in {WEIGHTS_FILE}")
+    else:
+        print("Starting from the built-in weights")
+    state = {"generation": 0, "weights": dict(strategies.WEIGHTS), "score": None, "sigma": INITIAL_SIGMA}
+    if args.resume:
+        with open(args.checkpoint) as f:
+            state = json.load(f)
+        print(f"Resuming at generation {state['generation']}, score {state['score']}")
+
+    chunk = max(1, args.games // max(1, args.workers))
+    with multiprocessing.Pool(args.workers) as pool:
+        while state["generation"] < args.generations:
+            generation = state["generation"]
+            rng = random.Random(f"{args.seed}-{generation}")
+            # Fresh games every generation, shared by all candidates so they compete on equal terms
+            seeds = [rng.randrange(2 ** 31) for _ in range(args.games)]
+            candidates = [state["weights"]] + [
+                perturb(rng, state["weights"], state["sigma"]) for _ in range(args.population)
+            ]
+
+            start = time.perf_counter()
+            shots = evaluate(pool, candidates, strategy_names, seeds, chunk)
+            scores = [statistics.mean(s) for s in shots]
+            best = min(range(len(candidates)), key=scores.__getitem__)
+            improved = best != 0 and edge(shots[0], shots[best]) > MIN_EDGE
+            if not improved:
+                best = 0
+            state["weights"] = candidates[best]
+            state["score"] = scores[best]
+            state["sigma"] = min(MAX_SIGMA, state["sigma"] * 1.2) if improved else max(MIN_SIGMA, state["sigma"] * 0.85)
+            state["generation"] = generation + 1
+            write_json(args.checkpoint, state)
+            print(f"generation {generation}: incumbent {scores[0]:.2f}, best candidate {min(scores[1:]):.2f} shots"
+                  f"{' (accepted)' if improved else ''}, sigma {state['sigma']:.3f}, "
+                  f"{time.perf_counter() - start:.1f}s")
+
+    write_json(args.out, {
+        "version": strategies.WEIGHTS_VERSION,
+        "weights": state["weights"],
+        "score": state["score"],
+        "strategies": strategy_names,
+        "games": args.games,
+        "generations": state["generation"],
+    })
+    print(f"Wrote {args.out}:")
+    for name, value in state["weights"].items():
+        print(f"  {name:<14} {value:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Local test client for the /game_ws WebSocket channel.
+
+Starts a game over HTTP to obtain a session cookie, then plays it to the end
+over the WebSocket, firing at random cells.
+
+Usage: python -m tools.ws_client [--url http://127.0.0.1:5000] [--difficulty medium] [--games 1] [-v]
+"""
+import argparse
+import http.client
+import json
+import random
+import urllib.parse
+
+import simple_websocket
+
+GRID_SIZE = 10
+
+# A valid fleet layout: one ship per even row, all horizontal
+FLEET = [{"row": i * 2, "col": 0, "direction": "H"} for i in range(5)]
+
+
+def start_game(base_url, difficulty="medium"):
+    """Create a game with a fixed fleet and return its cookies (session and player id)"""
+    url = urllib.parse.urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port)
+    headers = {"Content-Type": "application/json"}
+
+    conn.request("POST", "/new_game", json.dumps({"difficulty": difficulty}), headers)
+    response = conn.getresponse()
+    response.read()
+    cookies = [header.split(";", 1)[0] for header in response.headers.get_all("Set-Cookie") or []]
+    headers["Cookie"] = "; ".join(cookies)
+
+    conn.request("POST", "/place_ships", json.dumps({"ships": FLEET}), headers)
+    data = json.loads(conn.getresponse().read())
+    conn.close()
+    if data["status"] != "success":
+        raise RuntimeError(data.get("message", "Failed to place ships"))
+    return headers["Cookie"]
+
+
+def shot_order(seed=None):
+    """All cells in a random firing order"""
+    cells = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE)]
+    random.Random(seed).shuffle(cells)
+    return cells
+
+
+def play_ws_game(base_url, cookie, cells, verbose=False):
+    """Play a game over the WebSocket and return (shots sent, winner)"""
+    ws_url = base_url.replace("http", "ws", 1) + "/game_ws"
+    ws = simple_websocket.Client.connect(ws_url, headers={"Cookie": cookie})
+    shots = 0
+    winner = None
+    try:
+        for row, col in cells:
+            ws.send(json.dumps({"t": "shot", "r": row, "c": col}, separators=(",", ":")))
+            shots += 1
+
+            # Each turn comes back as one frame: our result and the AI's reply
+            for message in json.loads(ws.receive()):
+                if verbose:
+                    print(message)
+                winner = message.get("w") or winner
+            if winner:
+                break
+    finally:
+        ws.close()
+    return shots, winner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--difficulty", default="medium")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    for i in range(args.games):
+        cookie = start_game(args.url, args.difficulty)
+        shots, winner = play_ws_game(args.url, cookie, shot_order(i), args.verbose)
+        print(f"game {i + 1}: {shots} shots, winner: {winner}")
+
+
+if __name__ == "__main__":
+    main()
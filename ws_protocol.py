@@ -0,0 +1,190 @@
+import json
+
+import moves
+
+# Compact JSON turn protocol used on the /game_ws WebSocket channel.
+#
+# Client -> server:
+#   {"t": "shot", "r": 3, "c": 4}          fire at a cell
+#   {"t": "air", "k": "row", "i": 3}       air strike a row or column
+#   {"t": "pu", "n": "bomb", "r": 3, "c": 4, "d": "H"}   use a power-up ("d" optional)
+#   {"t": "state"}                         request the full game state
+#   {"t": "ping"}
+#
+# Server -> client, one frame per client message holding a JSON array of:
+#   {"t": "res", "r": 3, "c": 4, "h": 1}   result of the player's shot
+#   {"t": "air", "k": "row", "i": 3, "res": [[r, c, h], ...], "sunk": [...]}
+#   {"t": "pu", "n": "bomb", "r": 3, "c": 4, "d": "H", "res": [...], "sunk": [...]}
+#                                          result of the player's power-up, with "rv"
+#                                          ([[r, c, ship], ...]) for reveals
+#   {"t": "ai", "r": 5, "c": 6, "h": 0}    the AI's reply
+#   {"t": "aipu", ...}                     the AI's reply when it used a power-up
+#   {"t": "state", "g": {...}}             full state, same shape as /get_game_state
+#   {"t": "err", "m": "..."}              with "ra" (seconds to wait before retrying)
+#                                          when the server is too busy to take a move
+#   {"t": "pong"}
+#
+# Moves (shot, air, pu) may carry an "id"; a move whose id was seen before is
+# answered with the replies recorded for it instead of being played again.
+#
+# Shot results gain "s" (ship name) and "sc" ([[r, c], ...] ship cells) when a ship
+# sinks, and "w" (the winner) when the shot ends the game.
+
+
+def encode(messages):
+    """Serialize a batch of outgoing messages as one compact JSON frame"""
+    return json.dumps(messages, separators=(',', ':'))
+
+
+def error(message):
+    return {"t": "err", "m": message}
+
+
+def shot_message(kind, result):
+    """Convert a shot result dict from BattleshipGame into a compact message"""
+    message = {"t": kind, "r": result["row"], "c": result["col"], "h": int(result["hit"])}
+    if result.get("shipSunk"):
+        message["s"] = result["shipName"]
+        message["sc"] = [[cell["row"], cell["col"]] for cell in result["shipCells"]]
+    if result.get("gameOver"):
+        message["w"] = result["winner"]
+    return message
+
+
+def air_strike_message(result):
+    """Convert an air strike result into a compact message"""
+    message = {
+        "t": "air",
+        "k": result["targetType"],
+        "i": result["targetIndex"],
+        "res": [[cell["row"], cell["col"], int(cell["hit"])] for cell in result["results"]],
+        "sunk": [
+            {"s": ship["shipName"], "sc": [[cell["row"], cell["col"]] for cell in ship["shipCells"]]}
+            for ship in result["sunkShips"]
+        ]
+    }
+    if result.get("gameOver"):
+        message["w"] = result["winner"]
+    return message
+
+
+def powerup_message(kind, result):
+    """Convert a power-up result into a compact message"""
+    message = {
+        "t": kind,
+        "n": result["powerUp"],
+        "r": result["row"],
+        "c": result["col"],
+        "d": result["direction"],
+        "res": [[cell["row"], cell["col"], int(cell["hit"])] for cell in result["results"]],
+        "sunk": [
+            {"s": ship["shipName"], "sc": [[cell["row"], cell["col"]] for cell in ship["shipCells"]]}
+            for ship in result["sunkShips"]
+        ]
+    }
+    if "revealed" in result:
+        message["rv"] = [[cell["row"], cell["col"], int(cell["ship"])] for cell in result["revealed"]]
+    if result.get("gameOver"):
+        message["w"] = result["winner"]
+    return message
+
+
+def ai_reply(game):
+    """Let the AI take its turn, if it is due, and describe the move"""
+    if game.current_turn != "ai" or game.game_over:
+        return []
+
+    result = game.ai_shoot()
+    if result["status"] != "success":
+        return [error(result["message"])]
+
+    if "powerUp" in result:
+        return [powerup_message("aipu", result)]
+    return [shot_message("ai", result)]
+
+
+def _valid_index(game, value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < game.size
+
+
+MOVE_KINDS = ("shot", "air", "pu")
+
+
+def handle_message(game, raw, guard=None, scheduler=None):
+    """Apply one client message to a game and return the messages to send back.
+
+    guard is a moves.MoveGuard for answering repeated move ids, or None;
+    scheduler is an admission.Scheduler that may turn moves away under load, or None.
+    """
+    try:
+        message = json.loads(raw)
+    except (TypeError, ValueError):
+        return [error("Malformed message")]
+
+    if not isinstance(message, dict):
+        return [error("Malformed message")]
+
+    move_id = message.get("id") if guard is not None and message.get("t") in MOVE_KINDS else None
+    if move_id is not None:
+        if not isinstance(move_id, str):
+            return [error("Invalid move id")]
+        cached = guard.result(moves.WEBSOCKET, game.game_id, move_id)
+        if cached is not None:
+            return cached
+
+    if scheduler is not None and message.get("t") in MOVE_KINDS:
+        retry_after = scheduler.admit_move()
+        if retry_after is not None:
+            return [dict(error("Server busy"), ra=retry_after)]
+
+    replies = apply_message(game, message)
+    if move_id is not None:
+        guard.remember(moves.WEBSOCKET, game.game_id, move_id, replies)
+    return replies
+
+
+def apply_message(game, message):
+    """Apply one parsed client message to a game"""
+    kind = message.get("t")
+
+    if kind == "shot":
+        row, col = message.get("r"), message.get("c")
+        if not (_valid_index(game, row) and _valid_index(game, col)):
+            return [error("Invalid row or column")]
+
+        result = game.player_shoot(row, col)
+        if result["status"] != "success":
+            return [error(result["message"])]
+        replies = [shot_message("res", result)]
+
+    elif kind == "air":
+        target_type, target_index = message.get("k"), message.get("i")
+        if target_type not in ["row", "column"] or not _valid_index(game, target_index):
+            return [error("Invalid target type or index")]
+
+        result = game.player_air_strike(target_type, target_index)
+        if result["status"] != "success":
+            return [error(result["message"])]
+        replies = [air_strike_message(result)]
+
+    elif kind == "pu":
+        name, row, col = message.get("n"), message.get("r"), message.get("c")
+        if not (_valid_index(game, row) and _valid_index(game, col)):
+            return [error("Invalid row or column")]
+
+        result = game.player_use_powerup(name, row, col, message.get("d", "H"))
+        if result["status"] != "success":
+            return [error(result["message"])]
+        replies = [powerup_message("pu", result)]
+
+    elif kind == "state":
+        return [{"t": "state", "g": game.get_game_state()}]
+
+    elif kind == "ping":
+        return [{"t": "pong"}]
+
+    else:
+        return [error("Unknown message type")]
+
+    replies.extend(ai_reply(game))
+    return replies